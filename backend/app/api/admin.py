@@ -10,6 +10,7 @@ import asyncio
 
 from app.database import get_session
 from app.models import AppSettings
+from app.notifications import EmailNotifier
 
 logger = logging.getLogger(__name__)
 
@@ -36,15 +37,8 @@ class SettingsUpdate(BaseModel):
 @router.get("/settings", response_model=AppSettings)
 async def get_settings(session: Session = Depends(get_session)):
     """Get application settings."""
-    settings = session.get(AppSettings, 1)
-    if not settings:
-        # Create default settings if they don't exist
-        settings = AppSettings(id=1)
-        session.add(settings)
-        session.commit()
-        session.refresh(settings)
-
-    return settings
+    # The default row is created at startup, so this is a pure read
+    return session.get(AppSettings, 1) or AppSettings(id=1)
 
 
 @router.put("/settings", response_model=AppSettings)
@@ -82,7 +76,7 @@ async def update_settings(
 
     session.add(settings)
     session.commit()
-    session.refresh(settings)
+    EmailNotifier.invalidate_settings_cache()
 
     logger.info("Application settings updated")
     return settings
@@ -91,8 +85,6 @@ async def update_settings(
 @router.post("/settings/test-email")
 async def test_email(session: Session = Depends(get_session)):
     """Send a test email to verify SMTP configuration."""
-    from app.notifications import EmailNotifier
-
     settings = session.get(AppSettings, 1)
     if not settings:
         raise HTTPException(status_code=400, detail="Settings not configured")
@@ -111,7 +103,7 @@ async def test_email(session: Session = Depends(get_session)):
         )
 
     try:
-        success = EmailNotifier.send_test_email(settings)
+        success = await asyncio.to_thread(EmailNotifier.send_test_email, settings)
         if success:
             return {"status": "success", "message": "Test email sent successfully"}
         else:
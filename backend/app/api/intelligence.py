@@ -1,24 +1,37 @@
 """Intelligence API - modules, advisories, and LLM chat."""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, func, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, defer
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta, timezone
+from collections import Counter
+import asyncio
 import logging
 import os
-import glob
+import time
 
-from app.database import get_session
+from app.database import get_session, engine
 from app.models import (
     SiteModule, Advisory, ChatMessage, Site, Reading,
     StatusType, CriticalityLevel
 )
 from app.services.llm import LLMService
+from app.utils.timeutils import utcnow
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/intelligence", tags=["intelligence"])
 
+# Chat context cache: (built_at monotonic, data epoch, context)
+# Context only changes when new readings or advisories are stored, so
+# consecutive chat turns within the TTL reuse the same payload.
+_CONTEXT_TTL_SECONDS = 30.0
+_context_cache: Optional[Tuple[float, Tuple[Any, ...], Dict[str, Any]]] = None
+_context_lock = asyncio.Lock()
+
 
 # Pydantic models for requests/responses
 class ModuleCreate(BaseModel):
@@ -64,29 +77,23 @@ async def create_site_module(
     session: Session = Depends(get_session)
 ):
     """Add a module to monitor for a site."""
-    # Verify site exists
-    site = session.get(Site, site_id)
-    if not site:
+    # Verify site exists (primary key only, no need to load the whole row)
+    if session.exec(select(Site.id).where(Site.id == site_id)).first() is None:
         raise HTTPException(status_code=404, detail="Site not found")
 
-    # Check if module already exists
-    existing = session.exec(
-        select(SiteModule)
-        .where(SiteModule.site_id == site_id)
-        .where(SiteModule.module_name == module.module_name)
-    ).first()
-
-    if existing:
-        raise HTTPException(status_code=400, detail="Module already exists")
-
     new_module = SiteModule(
         site_id=site_id,
         module_name=module.module_name,
         enabled=module.enabled
     )
     session.add(new_module)
-    session.commit()
-    session.refresh(new_module)
+
+    # Uniqueness of (site_id, module_name) is enforced by the uq_sitemodule constraint
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Module already exists")
     return new_module
 
 
@@ -104,7 +111,6 @@ async def update_site_module(
     module.enabled = update.enabled
     session.add(module)
     session.commit()
-    session.refresh(module)
     return module
 
 
@@ -122,7 +128,7 @@ async def delete_site_module(module_id: int, session: Session = Depends(get_sess
 
 # ==================== Advisories ====================
 
-@router.get("/sites/{site_id}/advisories", response_model=List[Advisory])
+@router.get("/sites/{site_id}/advisories")
 async def get_site_advisories(
     site_id: str,
     days: int = 7,
@@ -133,7 +139,7 @@ async def get_site_advisories(
     query = select(Advisory).where(Advisory.site_id == site_id)
 
     # Filter by date
-    since = datetime.utcnow() - timedelta(days=days)
+    since = utcnow() - timedelta(days=days)
     query = query.where(Advisory.created_at >= since)
 
     # Filter by relevance
@@ -148,48 +154,62 @@ async def get_site_advisories(
 async def get_advisories_summary(session: Session = Depends(get_session)):
     """Get summary of all advisories."""
     # Get advisories from last 24 hours
-    since = datetime.utcnow() - timedelta(hours=24)
+    since = utcnow() - timedelta(hours=24)
 
-    all_advisories = session.exec(
-        select(Advisory)
+    # Count advisories per (affects_us, criticality) in a single grouped query
+    counts = session.exec(
+        select(Advisory.affects_us, Advisory.criticality, func.count())
         .where(Advisory.created_at >= since)
-        .order_by(Advisory.created_at.desc())
+        .group_by(Advisory.affects_us, Advisory.criticality)
     ).all()
 
-    affecting_us = [a for a in all_advisories if a.affects_us]
+    total = 0
+    criticality_counts = Counter()
+    for affects_us, criticality, count in counts:
+        total += count
+        if affects_us:
+            criticality_counts[criticality] += count
 
     by_criticality = {
-        "high": len([a for a in affecting_us if a.criticality == CriticalityLevel.HIGH]),
-        "medium": len([a for a in affecting_us if a.criticality == CriticalityLevel.MEDIUM]),
-        "low": len([a for a in affecting_us if a.criticality == CriticalityLevel.LOW]),
+        "high": criticality_counts.get(CriticalityLevel.HIGH, 0),
+        "medium": criticality_counts.get(CriticalityLevel.MEDIUM, 0),
+        "low": criticality_counts.get(CriticalityLevel.LOW, 0),
     }
 
+    # Only the columns returned below; skips description and other unused fields
+    recent = session.exec(
+        select(
+            Advisory.id,
+            Advisory.site_id,
+            Advisory.title,
+            Advisory.criticality,
+            Advisory.affects_us,
+            Advisory.affected_modules,
+            Advisory.created_at,
+        )
+        .where(Advisory.created_at >= since)
+        .where(Advisory.affects_us == True)
+        .order_by(Advisory.created_at.desc())
+        .limit(5)
+    ).all()
+
     return {
-        "total": len(all_advisories),
-        "affecting_us": len(affecting_us),
+        "total": total,
+        "affecting_us": sum(criticality_counts.values()),
         "by_criticality": by_criticality,
-        "recent": [
-            {
-                "id": a.id,
-                "site_id": a.site_id,
-                "title": a.title,
-                "criticality": a.criticality,
-                "affects_us": a.affects_us,
-                "affected_modules": a.affected_modules,
-                "created_at": a.created_at
-            }
-            for a in affecting_us[:5]
-        ]
+        "recent": [dict(a._mapping) for a in recent]
     }
 
 
 # ==================== Chat ====================
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, session: Session = Depends(get_session)):
+async def chat(request: ChatRequest):
     """Chat with AI about status dashboard data."""
-    # Get context data to provide service information
-    context = await _get_chat_context(session)
+    # Get context data to provide service information. The session is closed
+    # before the LLM call so no pooled connection is held during the round trip.
+    with Session(engine) as session:
+        context = await _get_cached_chat_context(session)
 
     # Log context for debugging
     logger.info(f"Chat context: {context.get('total_services', 0)} services, {len(context.get('current_issues', []))} issues, {len(context.get('recent_advisories', []))} advisories")
@@ -208,11 +228,11 @@ async def chat(request: ChatRequest, session: Session = Depends(get_session)):
     # Skip saving to database for speed
     return ChatResponse(
         response=response_text,
-        timestamp=datetime.utcnow()
+        timestamp=utcnow()
     )
 
 
-@router.get("/chat/history", response_model=List[ChatMessage])
+@router.get("/chat/history")
 async def get_chat_history(
     limit: int = 50,
     session: Session = Depends(get_session)
@@ -229,89 +249,147 @@ async def get_chat_history(
 @router.delete("/chat/history")
 async def clear_chat_history(session: Session = Depends(get_session)):
     """Clear chat history."""
-    session.exec(select(ChatMessage)).all()
-    for msg in session.exec(select(ChatMessage)).all():
-        session.delete(msg)
+    session.exec(delete(ChatMessage))
     session.commit()
     return {"status": "cleared"}
 
 
-async def _get_chat_context(session: Session) -> Dict[str, Any]:
+async def _get_cached_chat_context(session: Session) -> Dict[str, Any]:
+    """Get chat context, rebuilding only when stale or new data arrived."""
+    global _context_cache
+
+    async with _context_lock:
+        # The queries are synchronous; run them in the threadpool so they do
+        # not stall the event loop for other requests
+        epoch = await run_in_threadpool(_get_context_epoch, session)
+        if _context_cache is not None:
+            built_at, cached_epoch, context = _context_cache
+            if (
+                cached_epoch == epoch
+                and time.monotonic() - built_at < _CONTEXT_TTL_SECONDS
+            ):
+                return context
+
+        context = await run_in_threadpool(_get_chat_context, session)
+        _context_cache = (time.monotonic(), epoch, context)
+        return context
+
+
+def _get_context_epoch(session: Session) -> Tuple[Any, ...]:
+    """Get a cheap key that changes whenever a reading or advisory is stored."""
+    # MAX() over the integer primary keys is a single index lookup
+    return tuple(session.exec(
+        select(
+            select(func.max(Reading.id)).scalar_subquery(),
+            select(func.max(Advisory.id)).scalar_subquery(),
+        )
+    ).one())
+
+
+def _get_chat_context(session: Session) -> Dict[str, Any]:
     """Get simplified context data for chat."""
     # Get basic site status - simplified for speed
     all_sites_status = []
     current_issues = []
     historical_readings = []
-    sites = session.exec(select(Site).where(Site.is_active == True)).all()
 
     # Get historical data for recent issues and uptime (last 24 hours for chat context)
-    since = datetime.utcnow() - timedelta(hours=24)
-
-    for site in sites:
-        latest_reading = session.exec(
-            select(Reading)
-            .where(Reading.site_id == site.id)
-            .order_by(Reading.created_at.desc())
-            .limit(1)
-        ).first()
-
-        if latest_reading:
-            site_info = {
-                "site": site.display_name,
-                "status": latest_reading.status.value,
-                "summary": latest_reading.summary or "No details"
-            }
-            all_sites_status.append(site_info)
-
-            # Also track issues separately
-            if latest_reading.status != StatusType.OPERATIONAL:
-                current_issues.append(site_info)
-
-        # Get non-operational historical readings (issues only) for last 24h
-        # This keeps context small while showing actual problems
-        problem_readings = session.exec(
-            select(Reading)
-            .where(Reading.site_id == site.id)
-            .where(Reading.created_at >= since)
-            .where(Reading.status != 'operational')
-            .order_by(Reading.created_at.desc())
-            .limit(10)  # Limit to 10 most recent issues per service
-        ).all()
-
-        for reading in problem_readings:
-            historical_readings.append({
-                "site": site.display_name,
-                "status": reading.status.value,
-                "summary": reading.summary or "No details",
-                "timestamp": reading.created_at.isoformat()
-            })
+    # The same window is used for advisories below
+    now = utcnow()
+    since = now - timedelta(hours=24)
+
+    # Latest reading per active site in a single query, joined with Site for
+    # the display name. The correlated per-site LIMIT 1 is a seek on
+    # ix_readings_site_created, so it doesn't scan all of readings
+    latest = aliased(Reading)
+    latest_id = (
+        select(latest.id)
+        .where(latest.site_id == Site.id)
+        .order_by(latest.created_at.desc())
+        .limit(1)
+        .correlate(Site)
+        .scalar_subquery()
+    )
+    latest_rows = session.exec(
+        select(Reading, Site.display_name)
+        .options(defer(Reading.raw_snapshot))
+        .select_from(Site)
+        .join(Reading, Reading.id == latest_id)
+        .where(Site.is_active == True)
+        .order_by(Site.display_name)
+    ).all()
+
+    operational = StatusType.OPERATIONAL
+    for latest_reading, display_name in latest_rows:
+        site_info = {
+            "site": display_name,
+            "status": latest_reading.status.value,
+            "summary": latest_reading.summary or "No details"
+        }
+        all_sites_status.append(site_info)
+
+        # Also track issues separately
+        if latest_reading.status is not operational:
+            current_issues.append(site_info)
+
+    # Get non-operational historical readings (issues only) for last 24h in one query
+    # This keeps context small while showing actual problems
+    problem_rank = func.row_number().over(
+        partition_by=Reading.site_id,
+        order_by=Reading.created_at.desc()
+    ).label("rn")
+    ranked_problems = (
+        select(Reading.id, problem_rank)
+        .join(Site, Site.id == Reading.site_id)
+        .where(Site.is_active == True)
+        .where(Reading.created_at >= since)
+        .where(Reading.status != StatusType.OPERATIONAL)
+        .subquery()
+    )
+    problem_rows = session.exec(
+        select(Reading, Site.display_name)
+        .options(defer(Reading.raw_snapshot))
+        .join(ranked_problems, Reading.id == ranked_problems.c.id)
+        .join(Site, Site.id == Reading.site_id)
+        .where(ranked_problems.c.rn <= 10)  # Limit to 10 most recent issues per service
+        .order_by(Site.display_name, Reading.created_at.desc())
+    ).all()
+
+    for reading, display_name in problem_rows:
+        historical_readings.append({
+            "site": display_name,
+            "status": reading.status.value,
+            "summary": reading.summary or "No details",
+            "timestamp": reading.created_at.isoformat()
+        })
 
     # Get recent advisories (last 24 hours)
-    since = datetime.utcnow() - timedelta(hours=24)
+    # Select only the fields that go into the prompt instead of full Advisory rows
     advisories = session.exec(
-        select(Advisory)
+        select(
+            Advisory.site_id,
+            Advisory.title,
+            Advisory.criticality,
+            Advisory.affects_us,
+            Advisory.affected_modules,
+            Advisory.relevance_reason,
+        )
         .where(Advisory.created_at >= since)
         .order_by(Advisory.created_at.desc())
     ).all()
 
-    recent_advisories = []
-    for adv in advisories:
-        recent_advisories.append({
-            "site_id": adv.site_id,
-            "title": adv.title,
-            "criticality": adv.criticality.value,
-            "affects_us": adv.affects_us,
-            "affected_modules": adv.affected_modules,
-            "relevance_reason": adv.relevance_reason
-        })
+    recent_advisories = [
+        {**adv._mapping, "criticality": adv.criticality.value}
+        for adv in advisories
+    ]
 
     # Get all configured modules across all sites
-    all_modules = session.exec(
-        select(SiteModule)
+    configured_modules = list(session.exec(
+        select(SiteModule.module_name)
         .where(SiteModule.enabled == True)
-    ).all()
-
-    configured_modules = list(set([m.module_name for m in all_modules]))
+        .distinct()
+        .order_by(SiteModule.module_name)
+    ).all())
 
     return {
         "total_services": len(all_sites_status),
@@ -320,7 +398,7 @@ async def _get_chat_context(session: Session) -> Dict[str, Any]:
         "recent_advisories": recent_advisories,
         "configured_modules": configured_modules,
         "historical_readings": historical_readings,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": now.isoformat()
     }
 
 
@@ -1,22 +1,31 @@
 """Sites API endpoints."""
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.responses import FileResponse
-from sqlmodel import Session, select
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, delete
+from typing import Optional
 from datetime import datetime
 import os
+import shutil
 import uuid
+import orjson
 from pydantic import BaseModel, field_validator
 
-from app.database import get_session
-from app.models import Site, Reading, ParserType
+from app.database import get_session, engine
+from app.models import Site, Reading, ParserType, PARSER_BY_VALUE
 from app.polling import polling_scheduler
+from app.api.state import invalidate_state_cache
+from app.utils.files import cached_file_response
+from app.utils.timeutils import utcnow
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Directory for uploaded screenshots
 SCREENSHOTS_DIR = "/data/downdetector_screenshots"
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Rows pulled from the cursor at a time when streaming the site list
+SITES_STREAM_BATCH_SIZE = 200
 
 router = APIRouter(prefix="/sites", tags=["sites"])
 
@@ -32,6 +41,7 @@ class SiteUpdateRequest(BaseModel):
     console_only: Optional[bool] = None
     use_playwright: Optional[bool] = None
     auth_state_file: Optional[str] = None
+    ready_selector: Optional[str] = None
     downdetector_url: Optional[str] = None
     latest_downdetector_screenshot: Optional[str] = None
     downdetector_screenshot_uploaded_at: Optional[datetime] = None
@@ -53,10 +63,37 @@ class SiteUpdateRequest(BaseModel):
         return v
 
 
-@router.get("", response_model=List[Site])
-async def list_sites(session: Session = Depends(get_session)):
-    """List all sites."""
-    sites = session.exec(select(Site)).all()
+@router.get("")
+async def list_sites(
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    stream: bool = False,
+    session: Session = Depends(get_session)
+):
+    """List sites, optionally keyset-paginated by id (?after=<id>&limit=N).
+
+    With ?stream=true the sites are sent as NDJSON, one object per line.
+    """
+    query = select(Site)
+    if after is not None or limit is not None or stream:
+        query = query.order_by(Site.id)
+    if after is not None:
+        query = query.where(Site.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+
+    if stream:
+        # The request session is closed before a streaming body is sent, so the
+        # generator opens its own and walks the cursor in batches
+        def generate():
+            with Session(engine) as stream_session:
+                for site in stream_session.exec(query.execution_options(yield_per=SITES_STREAM_BATCH_SIZE)):
+                    yield orjson.dumps(site.model_dump()) + b"\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    # No response_model: rows come straight from the table model, so skip re-validating each one
+    sites = session.exec(query).all()
     return sites
 
 
@@ -77,12 +114,13 @@ async def create_site(site: Site, session: Session = Depends(get_session)):
     if existing:
         raise HTTPException(status_code=400, detail="Site ID already exists")
 
-    site.created_at = datetime.utcnow()
-    site.updated_at = datetime.utcnow()
+    now = utcnow()
+    site.created_at = now
+    site.updated_at = now
 
     session.add(site)
     session.commit()
-    session.refresh(site)
+    invalidate_state_cache()
 
     # Add to polling schedule
     if site.is_active and not site.console_only:
@@ -105,15 +143,20 @@ async def update_site(
 
     # Update fields - only include fields that were actually set
     update_data = site_update.model_dump(exclude_unset=True)
+    if update_data.get("parser") is not None:
+        parser = PARSER_BY_VALUE.get(update_data["parser"])
+        if parser is None:
+            raise HTTPException(status_code=400, detail=f"Unknown parser: {update_data['parser']}")
+        update_data["parser"] = parser
     for key, value in update_data.items():
         if value is not None:  # Only update non-None values
             setattr(site, key, value)
 
-    site.updated_at = datetime.utcnow()
+    site.updated_at = utcnow()
 
     session.add(site)
     session.commit()
-    session.refresh(site)
+    invalidate_state_cache()
 
     # Update schedule
     if site.is_active and not site.console_only:
@@ -135,13 +178,12 @@ async def delete_site(site_id: str, session: Session = Depends(get_session)):
     # Remove from schedule
     polling_scheduler.remove_site_from_schedule(site.id)
 
-    # Delete readings
-    readings = session.exec(select(Reading).where(Reading.site_id == site_id)).all()
-    for reading in readings:
-        session.delete(reading)
+    # Delete readings in a single statement
+    session.exec(delete(Reading).where(Reading.site_id == site_id))
 
     session.delete(site)
     session.commit()
+    invalidate_state_cache()
 
     logger.info(f"Deleted site: {site.id}")
     return {"status": "deleted", "site_id": site_id}
@@ -158,6 +200,7 @@ async def poll_site_now(site_id: str, session: Session = Depends(get_session)):
         raise HTTPException(status_code=400, detail="Cannot poll console-only sites")
 
     await polling_scheduler.poll_site_now(site_id)
+    invalidate_state_cache()
 
     return {"status": "polling", "site_id": site_id}
 
@@ -183,6 +226,12 @@ async def get_site_history(
     return readings
 
 
+def _write_upload(src, filepath: str):
+    """Copy an uploaded file object to disk in fixed-size chunks."""
+    with open(filepath, 'wb') as f:
+        shutil.copyfileobj(src, f, UPLOAD_CHUNK_SIZE)
+
+
 @router.post("/{site_id}/downdetector-screenshot")
 async def upload_downdetector_screenshot(
     site_id: str,
@@ -201,26 +250,23 @@ async def upload_downdetector_screenshot(
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
 
-    # Ensure directory exists
-    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
-
     # Generate unique filename
+    uploaded_at = utcnow()
     file_extension = os.path.splitext(file.filename)[1] if file.filename else '.png'
-    filename = f"{site_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
+    filename = f"{site_id}_{uploaded_at.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
     filepath = os.path.join(SCREENSHOTS_DIR, filename)
 
     # Save file
     try:
-        contents = await file.read()
-        with open(filepath, 'wb') as f:
-            f.write(contents)
+        # Stream to disk in fixed-size chunks, off the event loop
+        await run_in_threadpool(_write_upload, file.file, filepath)
 
         # Update site with latest screenshot
         site.latest_downdetector_screenshot = filename
-        site.downdetector_screenshot_uploaded_at = datetime.utcnow()
+        site.downdetector_screenshot_uploaded_at = uploaded_at
         session.add(site)
         session.commit()
-        session.refresh(site)
+        invalidate_state_cache()
 
         logger.info(f"Uploaded DownDetector screenshot for {site_id}: {filename}")
 
@@ -236,7 +282,11 @@ async def upload_downdetector_screenshot(
 
 
 @router.get("/{site_id}/downdetector-screenshot")
-async def get_downdetector_screenshot(site_id: str, session: Session = Depends(get_session)):
+async def get_downdetector_screenshot(
+    site_id: str,
+    request: Request,
+    session: Session = Depends(get_session)
+):
     """Get the latest DownDetector screenshot for a site."""
     site = session.get(Site, site_id)
     if not site:
@@ -246,11 +296,14 @@ async def get_downdetector_screenshot(site_id: str, session: Session = Depends(g
         raise HTTPException(status_code=404, detail="No screenshot available")
 
     filepath = os.path.join(SCREENSHOTS_DIR, site.latest_downdetector_screenshot)
-    if not os.path.exists(filepath):
+    try:
+        st = await run_in_threadpool(os.stat, filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Screenshot file not found")
 
-    return FileResponse(
+    return cached_file_response(
+        request,
         filepath,
-        media_type="image/png",
-        headers={"Cache-Control": "public, max-age=300"}
+        cache_control="public, max-age=300",
+        stat_result=st,
     )
@@ -1,6 +1,7 @@
 """SQL Query API endpoints with guardrails."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
+import orjson
 from typing import Optional, List, Any, Dict
 from app.services.sql_query_generator import (
     SQLQueryGenerator,
@@ -62,38 +63,45 @@ async def generate_sql_query(request: SQLQueryRequest):
     return SQLQueryResponse(**result)
 
 
+# Static payload, built and serialized once at import instead of on every request
+QUERY_EXAMPLES = {
+    "examples": [
+        {
+            "task": "Show me all services that are currently in recently_resolved status",
+            "output_contract": "display_name TEXT, status TEXT, summary TEXT"
+        },
+        {
+            "task": "Calculate uptime percentage for each service over the last 7 days",
+            "output_contract": "site_id TEXT, display_name TEXT, uptime_percent REAL, total_checks INTEGER"
+        },
+        {
+            "task": "List all incidents in the last 24 hours with their duration",
+            "output_contract": "site TEXT, status TEXT, start_time TEXT, duration_minutes REAL"
+        },
+        {
+            "task": "Show services with the most status changes in the last week",
+            "output_contract": "display_name TEXT, change_count INTEGER, latest_status TEXT"
+        },
+        {
+            "task": "Get the average time to resolution for incidents by service",
+            "output_contract": "service TEXT, avg_resolution_hours REAL, incident_count INTEGER"
+        }
+    ],
+    "schema_info": {
+        "tables": ["sites", "readings", "advisories", "site_modules", "chat_messages"],
+        "key_columns": {
+            "sites": ["id", "display_name", "status_page"],
+            "readings": ["site_id", "status", "created_at", "last_changed_at"]
+        },
+        "status_values": ["operational", "recently_resolved", "degraded", "incident", "maintenance", "unknown"]
+    }
+}
+
+
+_QUERY_EXAMPLES_JSON = orjson.dumps(QUERY_EXAMPLES)
+
+
 @router.get("/examples")
 def get_query_examples():
     """Get example SQL query tasks."""
-    return {
-        "examples": [
-            {
-                "task": "Show me all services that are currently in recently_resolved status",
-                "output_contract": "display_name TEXT, status TEXT, summary TEXT"
-            },
-            {
-                "task": "Calculate uptime percentage for each service over the last 7 days",
-                "output_contract": "site_id TEXT, display_name TEXT, uptime_percent REAL, total_checks INTEGER"
-            },
-            {
-                "task": "List all incidents in the last 24 hours with their duration",
-                "output_contract": "site TEXT, status TEXT, start_time TEXT, duration_minutes REAL"
-            },
-            {
-                "task": "Show services with the most status changes in the last week",
-                "output_contract": "display_name TEXT, change_count INTEGER, latest_status TEXT"
-            },
-            {
-                "task": "Get the average time to resolution for incidents by service",
-                "output_contract": "service TEXT, avg_resolution_hours REAL, incident_count INTEGER"
-            }
-        ],
-        "schema_info": {
-            "tables": ["sites", "readings", "advisories", "site_modules", "chat_messages"],
-            "key_columns": {
-                "sites": ["id", "display_name", "status_page"],
-                "readings": ["site_id", "status", "created_at", "last_changed_at"]
-            },
-            "status_values": ["operational", "recently_resolved", "degraded", "incident", "maintenance", "unknown"]
-        }
-    }
+    return Response(content=_QUERY_EXAMPLES_JSON, media_type="application/json")
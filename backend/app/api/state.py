@@ -1,8 +1,11 @@
 """State API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
 from sqlmodel import Session, select
-from typing import List, Optional
+from sqlalchemy.orm import aliased, defer
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import time
 
 from app.database import get_session
 from app.models import Site, Reading, SiteState, StatusType
@@ -13,39 +16,126 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/state", tags=["state"])
 
-
+# /state is polled by every open dashboard; serve repeated requests within the
+# TTL from memory. Cleared on pause/resume/reload and on site changes.
+# The cache holds the encoded body, so hits skip serialization too.
+_STATE_TTL_SECONDS = 5.0
+_state_cache: Optional[Tuple[float, bytes]] = None
+
+_STATES_ADAPTER = TypeAdapter(List[SiteState])
+
+# Default for _get_site_state's prefetched values: None is a valid prefetched
+# value (site never polled / not scheduled), so "not fetched" needs its own marker
+_NOT_FETCHED = object()
+
+# Site columns copied into SiteState; /state selects only these
+_SITE_STATE_COLUMNS = (
+    Site.id,
+    Site.display_name,
+    Site.status_page,
+    Site.feed_url,
+    Site.parser,
+    Site.console_only,
+    Site.poll_frequency_seconds,
+    Site.downdetector_url,
+    Site.latest_downdetector_screenshot,
+    Site.downdetector_screenshot_uploaded_at,
+)
+
+
+# The read endpoints are plain def: their queries are synchronous, so FastAPI
+# runs them in the threadpool instead of blocking the event loop.
+# response_model documents the shape; the body is encoded by _STATES_ADAPTER.
 @router.get("", response_model=List[SiteState])
-async def get_all_states(session: Session = Depends(get_session)):
+def get_all_states(session: Session = Depends(get_session)):
     """Get current state for all sites."""
-    sites = session.exec(select(Site)).all()
+    global _state_cache
+    if _state_cache is not None:
+        built_at, cached_body = _state_cache
+        if time.monotonic() - built_at < _STATE_TTL_SECONDS:
+            return Response(content=cached_body, media_type="application/json")
+
+    sites = session.exec(select(*_SITE_STATE_COLUMNS)).all()
+    latest_readings = _fetch_latest_readings(session)
+    next_poll_times = polling_scheduler.get_next_poll_times()
 
     states = []
     for site in sites:
-        state = await _get_site_state(site, session)
+        state = _get_site_state(
+            site,
+            session,
+            latest_readings.get(site.id),
+            next_poll_times.get(site.id),
+        )
         states.append(state)
 
-    return states
+    body = _STATES_ADAPTER.dump_json(states)
+    _state_cache = (time.monotonic(), body)
+    return Response(content=body, media_type="application/json")
+
+
+def invalidate_state_cache():
+    """Drop the cached /state response so the next request rebuilds it."""
+    global _state_cache
+    _state_cache = None
 
 
 @router.get("/{site_id}", response_model=SiteState)
-async def get_site_state(site_id: str, session: Session = Depends(get_session)):
+def get_site_state(site_id: str, session: Session = Depends(get_session)):
     """Get current state for a specific site."""
     site = session.get(Site, site_id)
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
 
-    return await _get_site_state(site, session)
+    return _get_site_state(site, session)
 
 
-async def _get_site_state(site: Site, session: Session) -> SiteState:
-    """Helper to build SiteState from site and latest reading."""
-    # Get latest reading
-    latest_reading = session.exec(
-        select(Reading)
-        .where(Reading.site_id == site.id)
-        .order_by(Reading.created_at.desc())
+def _fetch_latest_readings(session: Session) -> Dict[str, Reading]:
+    """Fetch the latest reading of every site in one query, keyed by site id.
+
+    raw_snapshot is deferred: SiteState never uses it and it is the one JSON
+    column that has to be decoded per row.
+    """
+    # Correlated per-site LIMIT 1: each lookup is a seek on
+    # ix_readings_site_created, so the cost doesn't grow with the table
+    latest = aliased(Reading)
+    latest_id = (
+        select(latest.id)
+        .where(latest.site_id == Site.id)
+        .order_by(latest.created_at.desc())
         .limit(1)
-    ).first()
+        .correlate(Site)
+        .scalar_subquery()
+    )
+    readings = session.exec(
+        select(Reading)
+        .options(defer(Reading.raw_snapshot))
+        .select_from(Site)
+        .join(Reading, Reading.id == latest_id)
+    ).all()
+    return {reading.site_id: reading for reading in readings}
+
+
+def _get_site_state(
+    site: Site,
+    session: Session,
+    latest_reading: Any = _NOT_FETCHED,
+    next_poll_at: Any = _NOT_FETCHED
+) -> SiteState:
+    """Helper to build SiteState from site and latest reading.
+
+    site can be a Site or a row of _SITE_STATE_COLUMNS. Pass latest_reading
+    and next_poll_at when they have already been fetched in bulk to skip the
+    per-site lookups.
+    """
+    if latest_reading is _NOT_FETCHED:
+        latest_reading = session.exec(
+            select(Reading)
+            .options(defer(Reading.raw_snapshot))
+            .where(Reading.site_id == site.id)
+            .order_by(Reading.created_at.desc())
+            .limit(1)
+        ).first()
 
     if latest_reading:
         status = latest_reading.status
@@ -63,9 +153,11 @@ async def _get_site_state(site: Site, session: Session) -> SiteState:
         error_message = None
 
     # Get next poll time
-    next_poll_at = polling_scheduler.get_next_poll_time(site.id)
+    if next_poll_at is _NOT_FETCHED:
+        next_poll_at = polling_scheduler.get_next_poll_time(site.id)
 
-    return SiteState(
+    # Values come straight from typed columns, so skip validation
+    return SiteState.model_construct(
         site_id=site.id,
         display_name=site.display_name,
         status_page=site.status_page,
@@ -90,6 +182,7 @@ async def _get_site_state(site: Site, session: Session) -> SiteState:
 async def pause_polling():
     """Pause all polling."""
     polling_scheduler.pause()
+    invalidate_state_cache()
     return {"status": "paused"}
 
 
@@ -97,6 +190,7 @@ async def pause_polling():
 async def resume_polling():
     """Resume polling."""
     polling_scheduler.resume()
+    invalidate_state_cache()
     return {"status": "resumed"}
 
 
@@ -104,4 +198,5 @@ async def resume_polling():
 async def reload_sites():
     """Reload all sites and reschedule polling."""
     await polling_scheduler.reload_sites()
+    invalidate_state_cache()
     return {"status": "reloaded"}
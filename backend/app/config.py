@@ -1,4 +1,5 @@
 """Application configuration."""
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -15,7 +16,7 @@ class Settings(BaseSettings):
     request_timeout: int = 60  # Increased for heavy pages like M365 admin
 
     # Retry & backoff
-    max_retries: int = 3
+    max_retries: int = 3  # Total fetch attempts, including the first
     retry_backoff_factor: float = 2.0
 
     # Scraping
@@ -43,4 +44,10 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing env and .env only once."""
+    return Settings()
+
+
+settings = get_settings()
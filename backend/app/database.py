@@ -1,20 +1,55 @@
 """Database connection and initialization."""
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Create engine with proper pooling for SQLite
-# StaticPool uses a single connection which is better for SQLite
-if "sqlite" in settings.database_url:
+# Per-connection SQLite tuning: WAL lets readers run alongside the poller's
+# writes, and NORMAL sync is safe under WAL with far fewer fsyncs
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    """Whether the URL points at an in-memory SQLite database."""
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+if "sqlite" in settings.database_url and _is_memory_sqlite(settings.database_url):
+    # An in-memory database only exists on its connection, so share a single one
     engine = create_engine(
         settings.database_url,
         echo=False,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+elif "sqlite" in settings.database_url:
+    # File-backed SQLite: a small pool so concurrent requests get their own connections
+    engine = create_engine(
+        settings.database_url,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        pool_size=8,
+        max_overflow=16,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
 else:
     # For other databases, use larger pool
     engine = create_engine(
@@ -36,5 +71,7 @@ def init_db():
 
 def get_session():
     """Get database session."""
-    with Session(engine) as session:
+    # Attributes stay loaded after commit, so handlers can return what they
+    # just wrote without a refresh round trip
+    with Session(engine, expire_on_commit=False) as session:
         yield session
@@ -1,29 +1,44 @@
 """FastAPI main application."""
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi import HTTPException
 from contextlib import asynccontextmanager
 import logging
 import json
 import os
+import re
 
 from app.config import settings
 from app.database import init_db, engine, Session
+from sqlmodel import select
+from sqlalchemy import insert
 from app.api import sites, state, admin, intelligence, sql_query
 from app.polling import polling_scheduler
-from app.models import Site
+from app.parsers import parser_factory
+from app.models import Site, AppSettings
+from app.utils.files import cached_file_response
+from app.utils.jsonlog import JsonFormatter
+from app.notifications import EmailNotifier
 
 # Configure logging
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    JsonFormatter()
+    if settings.log_format == "json"
+    else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    if settings.log_format != "json"
-    else None,
+    handlers=[_log_handler],
 )
 
 logger = logging.getLogger(__name__)
 
+CHARTS_DIR = "/data/downdetector_charts"
+_is_safe_chart_filename = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*").fullmatch
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,9 +46,24 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Status Dashboard...")
 
+    # Fail fast if a router got mounted twice
+    check_duplicate_routes(app)
+
     # Initialize database
     init_db()
 
+    # Make sure the settings row exists so settings reads never write
+    ensure_app_settings()
+
+    # Warm the notification settings cache so the first poll doesn't load it
+    EmailNotifier.get_settings()
+
+    # Create the screenshot upload directory once instead of on every upload
+    try:
+        os.makedirs(sites.SCREENSHOTS_DIR, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not create screenshots directory {sites.SCREENSHOTS_DIR}: {e}")
+
     # Load seed data if database is empty
     await load_seed_data()
 
@@ -45,13 +75,34 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Status Dashboard...")
     polling_scheduler.stop()
+    await parser_factory.close()
+
+
+def check_duplicate_routes(app: FastAPI):
+    """Raise if the same method and path are registered more than once."""
+    seen = set()
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            key = (method, route.path)
+            if key in seen:
+                raise RuntimeError(f"Duplicate route registered: {method} {route.path}")
+            seen.add(key)
+
+
+def ensure_app_settings():
+    """Create the default AppSettings row if it does not exist yet."""
+    with Session(engine) as session:
+        if session.get(AppSettings, 1) is None:
+            session.add(AppSettings(id=1))
+            session.commit()
+            logger.info("Created default application settings")
 
 
 async def load_seed_data():
     """Load seed configuration if database is empty."""
     with Session(engine) as session:
-        existing_sites = session.exec(session.query(Site)).first()
-        if existing_sites:
+        existing_site = session.exec(select(Site.id).limit(1)).first()
+        if existing_site is not None:
             logger.info("Database already contains sites, skipping seed data")
             return
 
@@ -60,11 +111,13 @@ async def load_seed_data():
         with open("seed_config.json", "r") as f:
             seed_data = json.load(f)
 
-        with Session(engine) as session:
-            for site_data in seed_data.get("sites", []):
-                site = Site(**site_data)
-                session.add(site)
-            session.commit()
+        # Validate once through the model (applies defaults and enum coercion),
+        # then insert all rows in a single executemany instead of per-object flushes
+        rows = [Site.model_validate(site_data).model_dump() for site_data in seed_data.get("sites", [])]
+        if rows:
+            with Session(engine) as session:
+                session.execute(insert(Site), rows)
+                session.commit()
 
         logger.info(f"Loaded {len(seed_data.get('sites', []))} sites from seed data")
     except FileNotFoundError:
@@ -79,6 +132,7 @@ app = FastAPI(
     description="API for monitoring service status pages",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -118,22 +172,23 @@ async def health():
 
 
 @app.get("/api/downdetector/charts/{filename}")
-async def get_downdetector_chart(filename: str):
+async def get_downdetector_chart(filename: str, request: Request):
     """Serve DownDetector chart screenshot."""
-    charts_dir = "/data/downdetector_charts"
-    filepath = os.path.join(charts_dir, filename)
-
-    # Security: prevent directory traversal
-    if ".." in filename or "/" in filename:
+    # Security: plain file names only, which rules out directory traversal
+    if not _is_safe_chart_filename(filename):
         raise HTTPException(status_code=400, detail="Invalid filename")
 
-    if not os.path.exists(filepath):
+    filepath = os.path.join(CHARTS_DIR, filename)
+    try:
+        st = await run_in_threadpool(os.stat, filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Chart not found")
 
-    return FileResponse(
+    return cached_file_response(
+        request,
         filepath,
-        media_type="image/png",
-        headers={"Cache-Control": "public, max-age=3600"}
+        cache_control="public, max-age=3600",
+        stat_result=st,
     )
 
 
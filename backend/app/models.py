@@ -1,9 +1,25 @@
 """Database models."""
 from sqlmodel import Field, SQLModel, Relationship, Column, JSON
+from sqlalchemy import Index, UniqueConstraint, text
 from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 
+__all__ = [
+    "ParserType",
+    "StatusType",
+    "CriticalityLevel",
+    "STATUS_BY_VALUE",
+    "PARSER_BY_VALUE",
+    "Site",
+    "Reading",
+    "SiteModule",
+    "Advisory",
+    "ChatMessage",
+    "AppSettings",
+    "SiteState",
+]
+
 
 class ParserType(str, Enum):
     """Parser types."""
@@ -23,6 +39,12 @@ class StatusType(str, Enum):
     UNKNOWN = "unknown"
 
 
+# Raw value -> member lookups for strings coming from parsers and requests;
+# a plain dict get instead of going through Enum.__call__ per value
+STATUS_BY_VALUE = {status.value: status for status in StatusType}
+PARSER_BY_VALUE = {parser.value: parser for parser in ParserType}
+
+
 class Site(SQLModel, table=True):
     """Monitored site configuration."""
 
@@ -38,6 +60,7 @@ class Site(SQLModel, table=True):
     console_only: bool = Field(default=False)  # For AWS Health Dashboard etc.
     use_playwright: bool = Field(default=False)  # Use headless browser for dynamic content
     auth_state_file: Optional[str] = None  # Path to saved authentication state for Playwright
+    ready_selector: Optional[str] = None  # CSS selector that marks a Playwright page as rendered
     downdetector_url: Optional[str] = None  # DownDetector URL for user-reported issues
     latest_downdetector_screenshot: Optional[str] = None  # Filename of latest uploaded screenshot
     downdetector_screenshot_uploaded_at: Optional[datetime] = None  # When screenshot was uploaded
@@ -54,9 +77,21 @@ class Reading(SQLModel, table=True):
     """Status reading/snapshot."""
 
     __tablename__ = "readings"
+    __table_args__ = (
+        # Latest-reading-per-site and per-site time window lookups
+        Index("ix_readings_site_created", "site_id", "created_at"),
+        # Problem readings only (enum columns store member names, e.g. OPERATIONAL)
+        Index(
+            "ix_readings_problems",
+            "site_id",
+            "created_at",
+            sqlite_where=text("status != 'OPERATIONAL'"),
+            postgresql_where=text("status != 'OPERATIONAL'"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    site_id: str = Field(foreign_key="sites.id", index=True)
+    site_id: str = Field(foreign_key="sites.id")  # Served by ix_readings_site_created
     status: StatusType
     summary: Optional[str] = None
     source_type: str  # "rss", "json", "html"
@@ -75,6 +110,9 @@ class SiteModule(SQLModel, table=True):
     """Modules/packages that a user cares about for a site."""
 
     __tablename__ = "site_modules"
+    __table_args__ = (
+        UniqueConstraint("site_id", "module_name", name="uq_sitemodule"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     site_id: str = Field(foreign_key="sites.id", index=True)
@@ -95,6 +133,9 @@ class Advisory(SQLModel, table=True):
     """Service advisories and notices."""
 
     __tablename__ = "advisories"
+    __table_args__ = (
+        Index("ix_advisories_site_created", "site_id", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     site_id: str = Field(foreign_key="sites.id", index=True)
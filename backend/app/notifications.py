@@ -1,25 +1,279 @@
 """Email notification service."""
+import atexit
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+from email.message import EmailMessage
 from datetime import datetime, timedelta
-from typing import Optional
+from html import escape
+from string import Template
+from typing import Dict, Optional, Tuple
 import logging
+import time
 
 from app.models import Site, StatusType, AppSettings
 from app.database import engine, Session
 
 logger = logging.getLogger(__name__)
 
+# AppSettings is read several times per status change but only changes from
+# the admin settings page, which invalidates this cache on write.
+_SETTINGS_TTL_SECONDS = 30.0
+_settings_cache: Optional[Tuple[float, Optional[AppSettings]]] = None
+
+# Per-site cooldown deadlines (monotonic), claimed when a notification is
+# decided on. last_notified_at keeps the durable record across restarts.
+_cooldown_until: Dict[str, float] = {}
+_cooldown_lock = threading.Lock()
+
+
+class _SMTPConnection:
+    """
+    A reusable, authenticated SMTP session shared by all sends.
+
+    Connecting, STARTTLS and AUTH cost several round trips, so the session is
+    kept open between messages. It is re-established when the SMTP settings
+    change, after sitting idle, when NOOP shows the server dropped it, and
+    after MAX_MESSAGES sends.
+    """
+
+    MAX_MESSAGES = 100
+    MAX_IDLE_SECONDS = 240.0
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._key: Optional[Tuple] = None
+        self._sent = 0
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, msg, app_settings: AppSettings):
+        """Send a message, reconnecting once if the session was dropped."""
+        with self._lock:
+            server = self._connect(app_settings)
+            try:
+                server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._close()
+                server = self._connect(app_settings)
+                server.send_message(msg)
+
+            self._sent += 1
+            self._last_used = time.monotonic()
+            if self._sent >= self.MAX_MESSAGES:
+                self._close()
+
+    def close(self):
+        """Quit the current session, if any."""
+        with self._lock:
+            self._close()
+
+    def _connect(self, app_settings: AppSettings) -> smtplib.SMTP:
+        key = (
+            app_settings.smtp_host,
+            app_settings.smtp_port,
+            app_settings.smtp_username,
+            app_settings.smtp_password,
+        )
+        if self._server is not None and (
+            key != self._key
+            or time.monotonic() - self._last_used > self.MAX_IDLE_SECONDS
+            or not self._is_alive()
+        ):
+            self._close()
+
+        if self._server is None:
+            server = smtplib.SMTP(app_settings.smtp_host, app_settings.smtp_port)
+            try:
+                server.starttls()
+                server.login(app_settings.smtp_username, app_settings.smtp_password)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+            self._key = key
+            self._sent = 0
+            self._last_used = time.monotonic()
+        return self._server
+
+    def _is_alive(self) -> bool:
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+        self._key = None
+
+
+_smtp_connection = _SMTPConnection()
+atexit.register(_smtp_connection.close)
+
+# Statuses that count as healthy when deciding what to notify about
+_HEALTHY_STATUSES = frozenset({StatusType.OPERATIONAL, StatusType.RECENTLY_RESOLVED})
+_PROBLEM_STATUSES = frozenset({StatusType.DEGRADED, StatusType.INCIDENT, StatusType.MAINTENANCE})
+
+# Any change away from operational is notified (including a brief issue that
+# is already recently resolved)
+_DEGRADATION_TRANSITIONS = frozenset(
+    (StatusType.OPERATIONAL, new) for new in StatusType if new != StatusType.OPERATIONAL
+)
+# Returning to healthy from a problem; notified only if the problem was
+_RECOVERY_TRANSITIONS = frozenset(
+    (old, new) for old in _PROBLEM_STATUSES for new in _HEALTHY_STATUSES
+)
+
+_STATUS_EMOJI = {
+    StatusType.OPERATIONAL: "✅",
+    StatusType.RECENTLY_RESOLVED: "🔄",
+    StatusType.DEGRADED: "⚠️",
+    StatusType.INCIDENT: "🚨",
+    StatusType.MAINTENANCE: "🔧",
+    StatusType.UNKNOWN: "❓",
+}
+
+# Status badge text, e.g. "✅ OPERATIONAL", built once per status
+_STATUS_LABELS = {
+    status: f"{_STATUS_EMOJI[status]} {status.value.upper()}" for status in StatusType
+}
+
+_STATUS_COLORS = {
+    StatusType.OPERATIONAL: "#10b981",  # green
+    StatusType.RECENTLY_RESOLVED: "#84cc16",  # lime (yellow-green)
+    StatusType.DEGRADED: "#f59e0b",     # orange
+    StatusType.INCIDENT: "#ef4444",     # red
+    StatusType.MAINTENANCE: "#3b82f6",  # blue
+    StatusType.UNKNOWN: "#6b7280",      # gray
+}
+
+_SUBJECT_TEMPLATES = {
+    StatusType.OPERATIONAL: "✅ {name} - Service Restored",
+    StatusType.RECENTLY_RESOLVED: "🔄 {name} - Recently Resolved",
+    StatusType.DEGRADED: "⚠️ {name} - Performance Degraded",
+    StatusType.INCIDENT: "🚨 {name} - Incident Detected",
+    StatusType.MAINTENANCE: "🔧 {name} - Maintenance in Progress",
+}
+_DEFAULT_SUBJECT_TEMPLATE = "❓ {name} - Status Unknown"
+
+# Email bodies are parsed once at import; values are substituted per message.
+# Everything user- or feed-controlled is HTML-escaped before it goes into the
+# HTML body.
+_TEXT_BODY_TEMPLATE = Template("""
+Status Change Alert
+==================================================
+
+Service: $display_name
+Status: $old_label → $new_label
+Time: $time
+
+${summary_line}
+Status Page: $status_page
+
+==================================================
+This is an automated notification from your Status Dashboard.
+""")
+
+_HTML_SUMMARY_ROW_TEMPLATE = Template(
+    '<div class="info-row"><span class="label">Summary:</span> $summary</div>'
+)
+
+_HTML_BODY_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #f3f4f6; padding: 20px; border-radius: 8px; margin-bottom: 20px; }
+        .status-change { display: flex; align-items: center; gap: 10px; margin: 20px 0; }
+        .status-badge {
+            padding: 8px 16px;
+            border-radius: 6px;
+            font-weight: bold;
+            color: white;
+        }
+        .arrow { font-size: 24px; color: #6b7280; }
+        .info { margin: 20px 0; }
+        .info-row { margin: 10px 0; }
+        .label { font-weight: bold; color: #6b7280; }
+        .button {
+            display: inline-block;
+            padding: 12px 24px;
+            background: #3b82f6;
+            color: white;
+            text-decoration: none;
+            border-radius: 6px;
+            margin-top: 20px;
+        }
+        .footer { margin-top: 30px; padding-top: 20px; border-top: 1px solid #e5e7eb; color: #6b7280; font-size: 12px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2 style="margin: 0;">🔔 Status Change Alert</h2>
+        </div>
+
+        <div class="info">
+            <div class="info-row">
+                <span class="label">Service:</span> $display_name
+            </div>
+            <div class="info-row">
+                <span class="label">Time:</span> $time
+            </div>
+        </div>
+
+        <div class="status-change">
+            <span class="status-badge" style="background: $old_color;">
+                $old_label
+            </span>
+            <span class="arrow">→</span>
+            <span class="status-badge" style="background: $new_color;">
+                $new_label
+            </span>
+        </div>
+
+        $summary_row
+
+        <a href="$status_page" class="button">View Status Page</a>
+
+        <div class="footer">
+            This is an automated notification from your Status Dashboard.
+        </div>
+    </div>
+</body>
+</html>
+""")
+
 
 class EmailNotifier:
     """Handles email notifications for status changes."""
 
     @staticmethod
     def get_settings() -> Optional[AppSettings]:
-        """Get application settings from database."""
+        """Get application settings, cached for a short TTL."""
+        global _settings_cache
+        if _settings_cache is not None:
+            cached_at, app_settings = _settings_cache
+            if time.monotonic() - cached_at < _SETTINGS_TTL_SECONDS:
+                return app_settings
+
         with Session(engine) as session:
-            return session.get(AppSettings, 1)
+            app_settings = session.get(AppSettings, 1)
+        _settings_cache = (time.monotonic(), app_settings)
+        return app_settings
+
+    @staticmethod
+    def invalidate_settings_cache():
+        """Drop cached settings so the next read goes to the database."""
+        global _settings_cache
+        _settings_cache = None
 
     @staticmethod
     def is_configured() -> bool:
@@ -47,19 +301,19 @@ class EmailNotifier:
         3. Respect cooldown period to prevent spam
         4. Notify when returning to operational after an incident
         """
+        # Decide on the transition first: it needs no settings or database access
+        if not EmailNotifier._is_notifiable_transition(site, new_status, old_status):
+            return False
+
         # Email not configured
         if not EmailNotifier.is_configured():
             return False
 
-        # No status change
-        if new_status == old_status:
-            return False
+        app_settings = EmailNotifier.get_settings()
+        cooldown_minutes = app_settings.notification_cooldown_minutes if app_settings else 60
 
         # Check cooldown period
         if site.last_notified_at:
-            app_settings = EmailNotifier.get_settings()
-            cooldown_minutes = app_settings.notification_cooldown_minutes if app_settings else 60
-
             cooldown_expires = site.last_notified_at + timedelta(minutes=cooldown_minutes)
             if datetime.utcnow() < cooldown_expires:
                 logger.info(
@@ -67,22 +321,43 @@ class EmailNotifier:
                 )
                 return False
 
-        # Notify on degradation from operational
-        if old_status == StatusType.OPERATIONAL and new_status not in [StatusType.OPERATIONAL, StatusType.RECENTLY_RESOLVED]:
-            return True
+        # Claim the cooldown now, before the email goes out, so a concurrent
+        # poll of the same site can't send a duplicate in the meantime
+        if not EmailNotifier._claim_cooldown(site.id, cooldown_minutes):
+            logger.info(f"Skipping notification for {site.display_name} - already being notified")
+            return False
 
-        # Notify when going from operational to recently resolved (brief issue occurred)
-        if old_status == StatusType.OPERATIONAL and new_status == StatusType.RECENTLY_RESOLVED:
+        return True
+
+    @staticmethod
+    def _is_notifiable_transition(site: Site, new_status: StatusType, old_status: StatusType) -> bool:
+        """Apply the notification rules to a status transition."""
+        transition = (old_status, new_status)
+        if transition in _DEGRADATION_TRANSITIONS:
             return True
 
-        # Notify on recovery to operational or recently resolved (after being degraded/incident)
-        if old_status in [StatusType.DEGRADED, StatusType.INCIDENT, StatusType.MAINTENANCE] and new_status in [StatusType.OPERATIONAL, StatusType.RECENTLY_RESOLVED]:
-            # Only if we previously notified about the degradation
-            if site.last_notified_status and site.last_notified_status not in [StatusType.OPERATIONAL, StatusType.RECENTLY_RESOLVED]:
-                return True
+        # Only if we previously notified about the degradation
+        if transition in _RECOVERY_TRANSITIONS:
+            return bool(site.last_notified_status) and site.last_notified_status not in _HEALTHY_STATUSES
 
         return False
 
+    @staticmethod
+    def _claim_cooldown(site_id: str, cooldown_minutes: int) -> bool:
+        """Atomically start a site's cooldown; False if one is already running."""
+        now = time.monotonic()
+        with _cooldown_lock:
+            if _cooldown_until.get(site_id, 0.0) > now:
+                return False
+            _cooldown_until[site_id] = now + cooldown_minutes * 60
+            return True
+
+    @staticmethod
+    def _release_cooldown(site_id: str):
+        """Give up a claimed cooldown after a failed send so the next poll retries."""
+        with _cooldown_lock:
+            _cooldown_until.pop(site_id, None)
+
     @staticmethod
     def send_notification(
         site: Site,
@@ -97,31 +372,18 @@ class EmailNotifier:
         """
         if not EmailNotifier.is_configured():
             logger.warning("Email not configured - skipping notification")
+            EmailNotifier._release_cooldown(site.id)
             return False
 
         app_settings = EmailNotifier.get_settings()
-        if not app_settings:
-            return False
 
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = EmailNotifier._create_subject(site, new_status, old_status)
-            msg['From'] = app_settings.smtp_from_email
-            msg['To'] = app_settings.notification_email
-
-            # Create email body
-            text_body = EmailNotifier._create_text_body(site, new_status, old_status, summary)
-            html_body = EmailNotifier._create_html_body(site, new_status, old_status, summary)
-
-            msg.attach(MIMEText(text_body, 'plain'))
-            msg.attach(MIMEText(html_body, 'html'))
-
-            # Send email
-            with smtplib.SMTP(app_settings.smtp_host, app_settings.smtp_port) as server:
-                server.starttls()
-                server.login(app_settings.smtp_username, app_settings.smtp_password)
-                server.send_message(msg)
+            EmailNotifier._send_message(
+                app_settings,
+                subject=EmailNotifier._create_subject(site, new_status, old_status),
+                text_body=EmailNotifier._create_text_body(site, new_status, old_status, summary),
+                html_body=EmailNotifier._create_html_body(site, new_status, old_status, summary),
+            )
 
             logger.info(
                 f"Sent notification for {site.display_name}: {old_status} → {new_status}"
@@ -130,17 +392,13 @@ class EmailNotifier:
 
         except Exception as e:
             logger.error(f"Failed to send notification for {site.display_name}: {e}")
+            EmailNotifier._release_cooldown(site.id)
             return False
 
     @staticmethod
     def send_test_email(app_settings: AppSettings) -> bool:
         """Send a test email to verify SMTP configuration."""
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = "✅ Status Dashboard - Test Email"
-            msg['From'] = app_settings.smtp_from_email
-            msg['To'] = app_settings.notification_email
-
             text_body = """
 Status Dashboard Test Email
 ============================
@@ -178,14 +436,12 @@ Time: {}
 </html>
 """.format(datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'))
 
-            msg.attach(MIMEText(text_body, 'plain'))
-            msg.attach(MIMEText(html_body, 'html'))
-
-            # Send email
-            with smtplib.SMTP(app_settings.smtp_host, app_settings.smtp_port) as server:
-                server.starttls()
-                server.login(app_settings.smtp_username, app_settings.smtp_password)
-                server.send_message(msg)
+            EmailNotifier._send_message(
+                app_settings,
+                subject="✅ Status Dashboard - Test Email",
+                text_body=text_body,
+                html_body=html_body,
+            )
 
             logger.info("Test email sent successfully")
             return True
@@ -194,21 +450,24 @@ Time: {}
             logger.error(f"Failed to send test email: {e}")
             return False
 
+    @staticmethod
+    def _send_message(app_settings: AppSettings, subject: str, text_body: str, html_body: str):
+        """Build a text + HTML message and send it over the shared SMTP session."""
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = app_settings.smtp_from_email
+        msg['To'] = app_settings.notification_email
+
+        msg.set_content(text_body)
+        msg.add_alternative(html_body, subtype='html')
+
+        _smtp_connection.send(msg, app_settings)
+
     @staticmethod
     def _create_subject(site: Site, new_status: StatusType, old_status: StatusType) -> str:
         """Create email subject line."""
-        if new_status == StatusType.OPERATIONAL:
-            return f"✅ {site.display_name} - Service Restored"
-        elif new_status == StatusType.RECENTLY_RESOLVED:
-            return f"🔄 {site.display_name} - Recently Resolved"
-        elif new_status == StatusType.DEGRADED:
-            return f"⚠️ {site.display_name} - Performance Degraded"
-        elif new_status == StatusType.INCIDENT:
-            return f"🚨 {site.display_name} - Incident Detected"
-        elif new_status == StatusType.MAINTENANCE:
-            return f"🔧 {site.display_name} - Maintenance in Progress"
-        else:
-            return f"❓ {site.display_name} - Status Unknown"
+        template = _SUBJECT_TEMPLATES.get(new_status, _DEFAULT_SUBJECT_TEMPLATE)
+        return template.format(name=site.display_name)
 
     @staticmethod
     def _create_text_body(
@@ -218,34 +477,14 @@ Time: {}
         summary: Optional[str]
     ) -> str:
         """Create plain text email body."""
-        status_emoji = {
-            StatusType.OPERATIONAL: "✅",
-            StatusType.RECENTLY_RESOLVED: "🔄",
-            StatusType.DEGRADED: "⚠️",
-            StatusType.INCIDENT: "🚨",
-            StatusType.MAINTENANCE: "🔧",
-            StatusType.UNKNOWN: "❓",
-        }
-
-        body = f"""
-Status Change Alert
-{'=' * 50}
-
-Service: {site.display_name}
-Status: {status_emoji.get(old_status, '')} {old_status.upper()} → {status_emoji.get(new_status, '')} {new_status.upper()}
-Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}
-
-"""
-        if summary:
-            body += f"Summary: {summary}\n\n"
-
-        body += f"""
-Status Page: {site.status_page}
-
-{'=' * 50}
-This is an automated notification from your Status Dashboard.
-"""
-        return body
+        return _TEXT_BODY_TEMPLATE.substitute(
+            display_name=site.display_name,
+            old_label=_STATUS_LABELS.get(old_status) or old_status.upper(),
+            new_label=_STATUS_LABELS.get(new_status) or new_status.upper(),
+            time=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
+            summary_line=f"Summary: {summary}\n\n" if summary else "",
+            status_page=site.status_page,
+        )
 
     @staticmethod
     def _create_html_body(
@@ -255,91 +494,17 @@ This is an automated notification from your Status Dashboard.
         summary: Optional[str]
     ) -> str:
         """Create HTML email body."""
-        status_colors = {
-            StatusType.OPERATIONAL: "#10b981",  # green
-            StatusType.RECENTLY_RESOLVED: "#84cc16",  # lime (yellow-green)
-            StatusType.DEGRADED: "#f59e0b",     # orange
-            StatusType.INCIDENT: "#ef4444",     # red
-            StatusType.MAINTENANCE: "#3b82f6",  # blue
-            StatusType.UNKNOWN: "#6b7280",      # gray
-        }
-
-        status_emoji = {
-            StatusType.OPERATIONAL: "✅",
-            StatusType.RECENTLY_RESOLVED: "🔄",
-            StatusType.DEGRADED: "⚠️",
-            StatusType.INCIDENT: "🚨",
-            StatusType.MAINTENANCE: "🔧",
-            StatusType.UNKNOWN: "❓",
-        }
-
-        old_color = status_colors.get(old_status, "#6b7280")
-        new_color = status_colors.get(new_status, "#6b7280")
-
-        return f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background: #f3f4f6; padding: 20px; border-radius: 8px; margin-bottom: 20px; }}
-        .status-change {{ display: flex; align-items: center; gap: 10px; margin: 20px 0; }}
-        .status-badge {{
-            padding: 8px 16px;
-            border-radius: 6px;
-            font-weight: bold;
-            color: white;
-        }}
-        .arrow {{ font-size: 24px; color: #6b7280; }}
-        .info {{ margin: 20px 0; }}
-        .info-row {{ margin: 10px 0; }}
-        .label {{ font-weight: bold; color: #6b7280; }}
-        .button {{
-            display: inline-block;
-            padding: 12px 24px;
-            background: #3b82f6;
-            color: white;
-            text-decoration: none;
-            border-radius: 6px;
-            margin-top: 20px;
-        }}
-        .footer {{ margin-top: 30px; padding-top: 20px; border-top: 1px solid #e5e7eb; color: #6b7280; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h2 style="margin: 0;">🔔 Status Change Alert</h2>
-        </div>
-
-        <div class="info">
-            <div class="info-row">
-                <span class="label">Service:</span> {site.display_name}
-            </div>
-            <div class="info-row">
-                <span class="label">Time:</span> {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}
-            </div>
-        </div>
-
-        <div class="status-change">
-            <span class="status-badge" style="background: {old_color};">
-                {status_emoji.get(old_status, '')} {old_status.upper()}
-            </span>
-            <span class="arrow">→</span>
-            <span class="status-badge" style="background: {new_color};">
-                {status_emoji.get(new_status, '')} {new_status.upper()}
-            </span>
-        </div>
-
-        {f'<div class="info-row"><span class="label">Summary:</span> {summary}</div>' if summary else ''}
-
-        <a href="{site.status_page}" class="button">View Status Page</a>
-
-        <div class="footer">
-            This is an automated notification from your Status Dashboard.
-        </div>
-    </div>
-</body>
-</html>
-"""
+        summary_row = (
+            _HTML_SUMMARY_ROW_TEMPLATE.substitute(summary=escape(summary))
+            if summary else ''
+        )
+        return _HTML_BODY_TEMPLATE.substitute(
+            display_name=escape(site.display_name),
+            time=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
+            old_color=_STATUS_COLORS.get(old_status, "#6b7280"),
+            old_label=_STATUS_LABELS.get(old_status) or old_status.upper(),
+            new_color=_STATUS_COLORS.get(new_status, "#6b7280"),
+            new_label=_STATUS_LABELS.get(new_status) or new_status.upper(),
+            summary_row=summary_row,
+            status_page=escape(site.status_page),
+        )
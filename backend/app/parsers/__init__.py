@@ -1,5 +1,7 @@
 """Parser factory and utilities."""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+import asyncio
+import os
 import httpx
 from app.parsers.json_parser import JSONParser
 from app.parsers.rss_parser import RSSParser
@@ -10,6 +12,29 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on distinct MIME types remembered by the auto-select cache
+CONTENT_TYPE_CACHE_SIZE = 64
+
+# First delay before retrying a failed fetch; grows by settings.retry_backoff_factor
+RETRY_BASE_DELAY_SECONDS = 0.5
+
+# How long a Playwright fetch waits for a site's ready_selector after network idle
+PLAYWRIGHT_READY_TIMEOUT_MS = 5000
+# Fixed wait after network idle for Playwright sites without a ready_selector
+PLAYWRIGHT_SETTLE_SECONDS = 3
+
+# Content types status pages commonly send, resolved up front. Each maps to
+# the first parser whose can_parse accepts the content type alone; parsers
+# ahead of it in the factory's order still get to sniff the body.
+KNOWN_CONTENT_TYPES = {
+    "application/json": JSONParser,
+    "application/rss+xml": RSSParser,
+    "application/atom+xml": RSSParser,
+    "application/xml": RSSParser,
+    "text/xml": RSSParser,
+    "text/html": HTMLParser,
+}
+
 
 class ParserFactory:
     """Factory for creating and using appropriate parsers."""
@@ -20,13 +45,28 @@ class ParserFactory:
             RSSParser(),
             HTMLParser(),
         ]
+        # Index of the first parser that accepts the MIME type alone, per
+        # normalized MIME type; None means the header is not conclusive and
+        # the content is sniffed
+        parser_index = {type(p): i for i, p in enumerate(self.parsers)}
+        self._content_type_cache: Dict[str, Optional[int]] = {
+            mime: parser_index[parser_class]
+            for mime, parser_class in KNOWN_CONTENT_TYPES.items()
+        }
+        # Shared HTTP client so keep-alive connections are reused across polls
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Shared Playwright browser, launched on first use and reused across fetches
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = asyncio.Lock()
 
     async def parse_url(
         self,
         url: str,
         parser_type: ParserType = ParserType.AUTO,
         use_playwright: bool = False,
-        auth_state_file: Optional[str] = None
+        auth_state_file: Optional[str] = None,
+        ready_selector: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Fetch and parse a URL.
@@ -36,6 +76,7 @@ class ParserFactory:
             parser_type: Preferred parser type
             use_playwright: Use Playwright for dynamic content
             auth_state_file: Path to saved authentication state (for authenticated sessions)
+            ready_selector: CSS selector to wait for before reading a Playwright page
 
         Returns:
             Dict with status, summary, raw_data, last_changed_at, source_type
@@ -43,7 +84,7 @@ class ParserFactory:
         try:
             # Fetch content
             if use_playwright:
-                content, content_type = await self._fetch_with_playwright(url, auth_state_file)
+                content, content_type = await self._fetch_with_playwright(url, auth_state_file, ready_selector)
             else:
                 content, content_type = await self._fetch_with_httpx(url)
 
@@ -60,7 +101,7 @@ class ParserFactory:
             result = await parser.parse(content, url)
 
             # Add source type
-            source_type = self._get_source_type(parser)
+            source_type = parser.source_type
             result["source_type"] = source_type
 
             logger.info(f"Successfully parsed {url} using {source_type} parser: {result['status']}")
@@ -77,50 +118,170 @@ class ParserFactory:
                 "error": str(e),
             }
 
-    async def _fetch_with_httpx(self, url: str) -> tuple[str, str]:
-        """Fetch URL using httpx."""
-        headers = {
-            "User-Agent": settings.user_agent,
-            "Accept": "text/html,application/json,application/xml,application/rss+xml",
-        }
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared httpx client, creating it on first use."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=settings.request_timeout,
+                follow_redirects=True,
+                # Accept-Encoding is left to httpx: it advertises exactly the
+                # codings it can decode (gzip, deflate, and br with brotli installed)
+                headers={
+                    "User-Agent": settings.user_agent,
+                    "Accept": "text/html,application/json,application/xml,application/rss+xml",
+                },
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            )
+        return self._http_client
+
+    async def _fetch_with_httpx(self, url: str) -> tuple[bytes, str]:
+        """
+        Fetch URL using httpx.
+
+        Returns the raw body; the parsers decode it themselves, which lets
+        feedparser and BeautifulSoup honour the document's declared encoding.
+
+        Connection errors and 5xx responses are retried with exponential
+        backoff over the same pooled client, for at most settings.max_retries
+        attempts in total. Timeouts are not retried: a host that already used
+        the full request_timeout would hold a scrape slot for several more.
+        """
+        client = self._get_http_client()
+        attempt = 1
+        while True:
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+                break
+            except httpx.TimeoutException:
+                raise
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = (
+                    isinstance(e, httpx.TransportError)
+                    or e.response.status_code >= 500
+                )
+                if not retryable or attempt >= settings.max_retries:
+                    raise
+                delay = RETRY_BASE_DELAY_SECONDS * settings.retry_backoff_factor ** (attempt - 1)
+                attempt += 1
+                logger.info(
+                    f"Fetching {url} failed ({e!r}), attempt {attempt}/{settings.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+        content_type = response.headers.get("content-type", "")
+        return response.content, content_type
+
+    async def _get_browser(self):
+        """Get the shared Playwright browser, launching it on first use."""
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                # Chromium crashed or was killed; start over with a fresh one
+                logger.warning("Shared Playwright browser disconnected, relaunching")
+                self._browser = None
+                if self._playwright is not None:
+                    try:
+                        await self._playwright.stop()
+                    except Exception as e:
+                        logger.debug(f"Error stopping Playwright: {e}")
+                    self._playwright = None
+
+            if self._browser is None:
+                from playwright.async_api import async_playwright
 
-        async with httpx.AsyncClient(timeout=settings.request_timeout, follow_redirects=True) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            content_type = response.headers.get("content-type", "")
-            return response.text, content_type
+                logger.info("Launching shared Playwright browser")
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+            return self._browser
 
-    async def _fetch_with_playwright(self, url: str, auth_state_file: Optional[str] = None) -> tuple[str, str]:
-        """Fetch URL using Playwright (for dynamic pages)."""
-        from playwright.async_api import async_playwright
-        import os
+    async def close(self):
+        """Close the shared HTTP client and Playwright browser if they were created."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+        async with self._browser_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
 
-            # Create context with saved authentication if available
-            context_options = {}
-            if auth_state_file and os.path.exists(auth_state_file):
-                logger.info(f"Loading authentication state from {auth_state_file}")
-                context_options["storage_state"] = auth_state_file
+    async def _fetch_with_playwright(
+        self,
+        url: str,
+        auth_state_file: Optional[str] = None,
+        ready_selector: Optional[str] = None
+    ) -> tuple[str, str]:
+        """
+        Fetch URL using Playwright (for dynamic pages).
 
-            context = await browser.new_context(**context_options)
+        The page is read once ready_selector matches after the network is
+        idle, or after a short fixed settle for sites without one.
+        """
+        browser = await self._get_browser()
+
+        # Create context with saved authentication if available
+        context_options = {}
+        if auth_state_file and os.path.exists(auth_state_file):
+            logger.info(f"Loading authentication state from {auth_state_file}")
+            context_options["storage_state"] = auth_state_file
+
+        # Each fetch gets its own lightweight context; only the context is closed
+        context = await browser.new_context(**context_options)
+        try:
             page = await context.new_page()
             page.set_default_timeout(settings.request_timeout * 1000)
 
             await page.goto(url, wait_until="networkidle")
 
-            # Wait a bit for any dynamic content to load
-            import asyncio
-            await asyncio.sleep(3)
+            if ready_selector:
+                from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+                try:
+                    await page.wait_for_selector(ready_selector, timeout=PLAYWRIGHT_READY_TIMEOUT_MS)
+                except PlaywrightTimeoutError:
+                    logger.warning(
+                        f"Ready selector {ready_selector!r} not found on {url}, parsing page as loaded"
+                    )
+            else:
+                # No readiness signal: give client-side rendering a moment to finish
+                await asyncio.sleep(PLAYWRIGHT_SETTLE_SECONDS)
 
             content = await page.content()
-            await browser.close()
+        finally:
+            await context.close()
 
-            return content, "text/html"
+        return content, "text/html"
+
+    def _auto_select_parser(self, content_type: str, content: Union[str, bytes]):
+        """
+        Automatically select appropriate parser.
 
-    def _auto_select_parser(self, content_type: str, content: str):
-        """Automatically select appropriate parser."""
+        Parsers are tried in order, the first whose can_parse accepts wins.
+        The first parser that accepts on the content type alone is cached per
+        MIME type, so only the parsers ahead of it look at the body; e.g. an
+        RSS feed served as text/html still goes to the RSS parser.
+        """
+        mime = content_type.split(";", 1)[0].strip().lower()
+        if mime:
+            try:
+                index = self._content_type_cache[mime]
+            except KeyError:
+                # With empty content, can_parse decides on the content type only
+                index = next(
+                    (i for i, p in enumerate(self.parsers) if p.can_parse(mime, "")), None
+                )
+                if len(self._content_type_cache) < CONTENT_TYPE_CACHE_SIZE:
+                    self._content_type_cache[mime] = index
+            if index is not None:
+                for parser in self.parsers[:index]:
+                    if parser.can_parse(content_type, content):
+                        return parser
+                return self.parsers[index]
+
+        # No or inconclusive content type: sniff the body
         for parser in self.parsers:
             if parser.can_parse(content_type, content):
                 return parser
@@ -136,16 +297,6 @@ class ParserFactory:
         parser_class = mapping.get(parser_type)
         return parser_class() if parser_class else None
 
-    def _get_source_type(self, parser) -> str:
-        """Get source type string from parser."""
-        if isinstance(parser, JSONParser):
-            return "json"
-        elif isinstance(parser, RSSParser):
-            return "rss"
-        elif isinstance(parser, HTMLParser):
-            return "html"
-        return "unknown"
-
 
 # Global parser factory instance
 parser_factory = ParserFactory()
@@ -1,19 +1,30 @@
 """Base parser interface."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, ClassVar, Dict, Union
 from app.models import StatusType
 
 
+def content_head(content: Union[str, bytes], size: int = 512) -> str:
+    """Return the start of the content as text, for cheap format sniffing."""
+    head = content[:size]
+    if isinstance(head, bytes):
+        head = head.decode("utf-8", errors="ignore")
+    return head.lstrip()
+
+
 class BaseParser(ABC):
     """Base class for all parsers."""
 
+    # Reported as the reading's source_type
+    source_type: ClassVar[str] = "unknown"
+
     @abstractmethod
-    async def parse(self, content: str, url: str) -> Dict[str, Any]:
+    async def parse(self, content: Union[str, bytes], url: str) -> Dict[str, Any]:
         """
         Parse content and return structured data.
 
         Args:
-            content: Raw content (HTML, XML, JSON string)
+            content: Raw content (HTML, XML, JSON), as fetched bytes or text
             url: Source URL
 
         Returns:
@@ -26,7 +37,7 @@ class BaseParser(ABC):
         pass
 
     @abstractmethod
-    def can_parse(self, content_type: str, content: str) -> bool:
+    def can_parse(self, content_type: str, content: Union[str, bytes]) -> bool:
         """
         Check if this parser can handle the content.
 
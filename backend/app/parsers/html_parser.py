@@ -1,30 +1,139 @@
 """HTML scraper for status pages without feeds."""
-from bs4 import BeautifulSoup
-from typing import Dict, Any, Optional
-from app.parsers.base import BaseParser
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from typing import Dict, Any, Optional, Union
+from urllib.parse import urlsplit
+from app.parsers.base import BaseParser, content_head
 from app.models import StatusType
 from app.utils.normalizer import normalize_status
+from collections import Counter
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+# lxml builds the tree in C and is much faster than the pure-Python
+# html.parser; fall back to the latter where lxml isn't installed
+try:
+    BeautifulSoup("", "lxml")
+    SOUP_FEATURES = "lxml"
+except FeatureNotFound:
+    logger.warning("lxml is not installed, parsing HTML with html.parser")
+    SOUP_FEATURES = "html.parser"
+
+# Everything the extractors read is in <body>, apart from <title>; leaving the
+# rest of <head> (inline scripts, styles, metadata) out keeps it off the tree.
+# Only used with lxml, which always emits a <body> element, even for pages
+# that omit the tag; html.parser would drop the content of such pages.
+_BODY_AND_TITLE = SoupStrainer(["title", "body"]) if SOUP_FEATURES == "lxml" else None
+
+# Patterns are compiled once here instead of on every page
+# Statuspage.io
+_RE_STATUS_INDICATOR = re.compile(r"status.*indicator", re.I)
+_RE_PAGE_STATUS = re.compile(r"page-status", re.I)
+_RE_INCIDENT = re.compile(r"incident", re.I)
+_RE_RESOLVED = re.compile(r"resolved|completed", re.I)
+_RE_TITLE_OR_NAME = re.compile(r"title|name", re.I)
+# Statuspage.io data-component-status values
+_STATUSPAGE_COMPONENT_STATUS = {
+    'operational': StatusType.OPERATIONAL,
+    'degraded_performance': StatusType.DEGRADED,
+    'partial_outage': StatusType.DEGRADED,
+    'major_outage': StatusType.INCIDENT,
+    'under_maintenance': StatusType.MAINTENANCE,
+}
+# Overall indicator class keywords, checked in order
+_STATUSPAGE_INDICATOR_CLASSES = (
+    ("none", StatusType.OPERATIONAL, "All Systems Operational"),
+    ("operational", StatusType.OPERATIONAL, "All Systems Operational"),
+    ("minor", StatusType.DEGRADED, "Minor Service Issues"),
+    ("major", StatusType.INCIDENT, "Service Disruption"),
+    ("critical", StatusType.INCIDENT, "Service Disruption"),
+)
+# Generic pages
+_HEADER_TAGS = frozenset({"h1", "h2", "h3"})
+_RE_STATUS_BANNER = re.compile(r"status|banner|alert|notice", re.I)
+# StatusCast (Veeva)
+_RE_STATUSCAST_COMPONENT = re.compile(r"status-list-component-status-text")
+_RE_CURRENT_STATUS_COMP = re.compile(r"current-status-comp-status-text")
+_VEEVA_NORMAL_TEXTS = frozenset({"normal", "operational", "available"})
+# Checked in order against a component's text and classes; the first found
+# is the component's status
+_VEEVA_PROBLEM_KEYWORDS = ("maintenance", "degraded", "unavailable")
+# Overall status banner text; checked in order after the operational texts
+_VEEVA_BANNER_OPERATIONAL_TEXTS = frozenset({"operational", "all systems operational", "normal"})
+_VEEVA_BANNER_KEYWORDS = (
+    ("incident", StatusType.INCIDENT, "Service incident"),
+    ("major", StatusType.INCIDENT, "Service incident"),
+    ("outage", StatusType.INCIDENT, "Service incident"),
+    ("degraded", StatusType.DEGRADED, "Service degraded"),
+    ("minor", StatusType.DEGRADED, "Service degraded"),
+)
+# Microsoft 365 Admin Center
+_RE_M365_ITEM_DIV = re.compile(r"issue|incident|advisory|service-health-item", re.I)
+_RE_M365_ITEM_ROW = re.compile(r"issue|incident|row", re.I)
+_RE_M365_ITEM_LI = re.compile(r"issue|incident|advisory", re.I)
+_RE_M365_ADVISORY_ID = re.compile(r"\b([A-Z]{2}\d{6,})\b")
+_RE_M365_INCIDENT_WORD = re.compile(r"\bIncident\b")
+_RE_M365_DEGRADED_ITEM = re.compile(r"degraded|degradation", re.I)
+_RE_M365_ADVISORY_ITEM = re.compile(r"advisory|informational", re.I)
+_RE_M365_DEGRADED = re.compile(r"(service degradation|degraded)", re.I)
+_RE_M365_ADVISORIES = re.compile(r"(\d+)\s+advisor(?:y|ies)", re.I)
+_RE_DATE = re.compile(r"(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})")
+# Common M365 services, named in degradation summaries
+_M365_SERVICES = tuple(
+    (service, service.lower())
+    for service in ('Exchange Online', 'SharePoint', 'Teams', 'OneDrive', 'Outlook')
+)
+
+# Site-specific extractors, in the order they are tried
+_SITE_EXTRACTORS = ("_extract_status_veeva", "_extract_status_statuspage_io")
+
+# Upper bound on hosts remembered by the extractor cache
+HOST_EXTRACTOR_CACHE_SIZE = 1024
+# Host -> site-specific extractor that last recognised its page
+_HOST_EXTRACTORS: Dict[str, str] = {}
+
+
+def _line_context(text: str, pos: int, lines_around: int = 2) -> str:
+    """
+    Return the line containing pos plus lines_around lines on either side,
+    joined with spaces, without splitting the whole text into lines.
+    """
+    start = pos
+    for _ in range(lines_around + 1):
+        start = text.rfind('\n', 0, start)
+        if start == -1:
+            break
+    end = pos
+    for _ in range(lines_around + 1):
+        end = text.find('\n', end)
+        if end == -1:
+            end = len(text)
+            break
+        end += 1
+    else:
+        end -= 1
+    return text[start + 1:end].replace('\n', ' ')
+
 
 class HTMLParser(BaseParser):
     """Parser for HTML status pages using BeautifulSoup."""
 
-    def can_parse(self, content_type: str, content: str) -> bool:
+    source_type = "html"
+
+    def can_parse(self, content_type: str, content: Union[str, bytes]) -> bool:
         """Check if content is HTML."""
         if "html" in content_type.lower():
             return True
-        if content.strip().startswith("<!DOCTYPE") or content.strip().startswith("<html"):
+        head = content_head(content)
+        if head.startswith("<!DOCTYPE") or head.startswith("<html"):
             return True
         return False
 
-    async def parse(self, content: str, url: str) -> Dict[str, Any]:
+    async def parse(self, content: Union[str, bytes], url: str) -> Dict[str, Any]:
         """Parse HTML status page."""
         try:
-            soup = BeautifulSoup(content, "html.parser")
+            soup = BeautifulSoup(content, SOUP_FEATURES, parse_only=_BODY_AND_TITLE)
 
             # Initialize components storage
             self._components = []
@@ -36,17 +145,9 @@ class HTMLParser(BaseParser):
                 status = StatusType.UNKNOWN
                 summary = ""
 
-            # Try StatusCast (Veeva) if not M365
+            # Then StatusCast (Veeva) and Statuspage.io, finally generic extraction
             if status == StatusType.UNKNOWN:
-                status, summary = self._extract_status_veeva(soup)
-
-            # Then try Statuspage.io
-            if status == StatusType.UNKNOWN:
-                status, summary = self._extract_status_statuspage_io(soup)
-
-            # Finally try generic extraction
-            if status == StatusType.UNKNOWN:
-                status, summary = self._extract_status_generic(soup)
+                status, summary = self._extract_status_by_host(soup, url)
 
             raw_data = {
                 "url": url,
@@ -67,6 +168,36 @@ class HTMLParser(BaseParser):
             logger.error(f"Error parsing HTML from {url}: {e}")
             raise
 
+    def _extract_status_by_host(self, soup: BeautifulSoup, url: str) -> tuple[StatusType, str]:
+        """
+        Try the site-specific extractors in order, then generic extraction.
+
+        The extractor that recognised a host's page is remembered and tried
+        first on the next poll, skipping the scans of the ones before it.
+        Generic wins are not remembered: the Statuspage.io extractor also
+        collects components, so it has to keep running for those hosts.
+        """
+        host = urlsplit(url).netloc
+        cached = _HOST_EXTRACTORS.get(host)
+        if cached is not None:
+            status, summary = getattr(self, cached)(soup)
+            if status != StatusType.UNKNOWN:
+                return status, summary
+
+        for extractor in _SITE_EXTRACTORS:
+            if extractor == cached:
+                continue
+            status, summary = getattr(self, extractor)(soup)
+            if status != StatusType.UNKNOWN:
+                if host not in _HOST_EXTRACTORS and len(_HOST_EXTRACTORS) >= HOST_EXTRACTOR_CACHE_SIZE:
+                    # Evict the oldest host
+                    del _HOST_EXTRACTORS[next(iter(_HOST_EXTRACTORS))]
+                _HOST_EXTRACTORS[host] = extractor
+                return status, summary
+
+        _HOST_EXTRACTORS.pop(host, None)
+        return self._extract_status_generic(soup)
+
     def _extract_status_statuspage_io(self, soup: BeautifulSoup) -> tuple[StatusType, str]:
         """Extract status from Statuspage.io-based pages."""
         # Extract component-level status first
@@ -79,19 +210,7 @@ class HTMLParser(BaseParser):
 
             if name_elem:
                 component_name = name_elem.get_text(strip=True)
-                # Map Statuspage.io statuses to our StatusType
-                if status_attr == 'operational':
-                    comp_status = StatusType.OPERATIONAL
-                elif status_attr == 'degraded_performance':
-                    comp_status = StatusType.DEGRADED
-                elif status_attr == 'partial_outage':
-                    comp_status = StatusType.DEGRADED
-                elif status_attr == 'major_outage':
-                    comp_status = StatusType.INCIDENT
-                elif status_attr == 'under_maintenance':
-                    comp_status = StatusType.MAINTENANCE
-                else:
-                    comp_status = StatusType.UNKNOWN
+                comp_status = _STATUSPAGE_COMPONENT_STATUS.get(status_attr, StatusType.UNKNOWN)
 
                 components.append({
                     'name': component_name,
@@ -103,29 +222,26 @@ class HTMLParser(BaseParser):
         self._components = components
 
         # Look for status indicator
-        status_indicator = soup.find(class_=re.compile(r"status.*indicator", re.I))
+        status_indicator = soup.find(class_=_RE_STATUS_INDICATOR)
         if status_indicator:
             classes = " ".join(status_indicator.get("class", []))
-            if "none" in classes or "operational" in classes:
-                return StatusType.OPERATIONAL, "All Systems Operational"
-            elif "minor" in classes:
-                return StatusType.DEGRADED, "Minor Service Issues"
-            elif "major" in classes or "critical" in classes:
-                return StatusType.INCIDENT, "Service Disruption"
+            for keyword, status, summary in _STATUSPAGE_INDICATOR_CLASSES:
+                if keyword in classes:
+                    return status, summary
 
         # Look for overall status text
-        status_text_elem = soup.find(class_=re.compile(r"page-status", re.I))
+        status_text_elem = soup.find(class_=_RE_PAGE_STATUS)
         if status_text_elem:
             text = status_text_elem.get_text(strip=True)
             status = normalize_status(text)
             return status, text
 
         # Look for unresolved incidents
-        incidents = soup.find_all(class_=re.compile(r"incident", re.I))
+        incidents = soup.find_all(class_=_RE_INCIDENT)
         unresolved_incidents = []
         for incident in incidents:
-            if not re.search(r"resolved|completed", incident.get_text(), re.I):
-                title_elem = incident.find(class_=re.compile(r"title|name", re.I))
+            if not _RE_RESOLVED.search(incident.get_text()):
+                title_elem = incident.find(class_=_RE_TITLE_OR_NAME)
                 if title_elem:
                     unresolved_incidents.append(title_elem.get_text(strip=True))
 
@@ -136,32 +252,39 @@ class HTMLParser(BaseParser):
 
     def _extract_status_generic(self, soup: BeautifulSoup) -> tuple[StatusType, str]:
         """Generic status extraction strategy."""
-        # Look for common status keywords in prominent text
-        header_texts = []
-
-        # Check h1, h2 headers
-        for header in soup.find_all(["h1", "h2", "h3"]):
-            text = header.get_text(strip=True)
-            if text:
-                header_texts.append(text)
-
-        # Check divs with status-related classes
-        for div in soup.find_all("div", class_=re.compile(r"status|banner|alert|notice", re.I)):
-            text = div.get_text(strip=True)
-            if text and len(text) < 500:  # Avoid large content blocks
-                header_texts.append(text)
-
-        # Normalize and check
-        for text in header_texts:
-            status = normalize_status(text)
-            if status != StatusType.UNKNOWN:
-                return status, text[:200]  # Limit summary length
+        # Look for common status keywords in prominent text, in one walk of
+        # the tree. Headers take precedence over status divs, so the first
+        # header with a status returns at once while the first matching
+        # div is held until no header has matched.
+        div_match = None
+        for element in soup.descendants:
+            name = element.name
+            if name in _HEADER_TAGS:
+                text = element.get_text(strip=True)
+                if text:
+                    status = normalize_status(text)
+                    if status != StatusType.UNKNOWN:
+                        return status, text[:200]  # Limit summary length
+            elif (
+                name == "div"
+                and div_match is None
+                and _RE_STATUS_BANNER.search(" ".join(element.get("class", [])))
+            ):
+                # Check divs with status-related classes
+                text = element.get_text(strip=True)
+                if text and len(text) < 500:  # Avoid large content blocks
+                    status = normalize_status(text)
+                    if status != StatusType.UNKNOWN:
+                        div_match = (status, text[:200])
+
+        if div_match is not None:
+            return div_match
 
         # Fallback: look for "operational" or "incident" anywhere
         page_text = soup.get_text().lower()
-        if re.search(r"all systems operational|everything is operational", page_text):
+        if "all systems operational" in page_text or "everything is operational" in page_text:
             return StatusType.OPERATIONAL, "All Systems Operational"
-        if re.search(r"experiencing issues|service disruption|outage", page_text):
+        if "experiencing issues" in page_text or "service disruption" in page_text or "outage" in page_text:
             return StatusType.DEGRADED, "Service Issues Detected"
 
         return StatusType.UNKNOWN, "Unable to determine status"
@@ -170,29 +293,27 @@ class HTMLParser(BaseParser):
         """Extract status from Veeva trust site (StatusCast-based)."""
         # First check individual components - these are the actual live status
         # Look for: <span class="status-list-component-status-text ... component-available">Normal</span>
-        status_spans = soup.find_all("span", class_=re.compile(r"status-list-component-status-text"))
+        status_spans = soup.find_all("span", class_=_RE_STATUSCAST_COMPONENT)
 
         if status_spans:
             # Count component statuses
-            normal_count = 0
-            maintenance_count = 0
-            degraded_count = 0
-            unavailable_count = 0
-
+            counts = Counter()
             for span in status_spans:
                 text = span.get_text(strip=True).lower()
                 classes = " ".join(span.get("class", []))
 
-                if "component-available" in classes and text in ["normal", "operational", "available"]:
-                    normal_count += 1
-                elif "maintenance" in text or "maintenance" in classes:
-                    maintenance_count += 1
-                elif "degraded" in classes or "degraded" in text:
-                    degraded_count += 1
-                elif "unavailable" in classes or "unavailable" in text:
-                    unavailable_count += 1
+                if "component-available" in classes and text in _VEEVA_NORMAL_TEXTS:
+                    counts["normal"] += 1
+                else:
+                    for keyword in _VEEVA_PROBLEM_KEYWORDS:
+                        if keyword in text or keyword in classes:
+                            counts[keyword] += 1
+                            break
 
-            total_components = normal_count + maintenance_count + degraded_count + unavailable_count
+            normal_count = counts["normal"]
+            maintenance_count = counts["maintenance"]
+            degraded_count = counts["degraded"]
+            unavailable_count = counts["unavailable"]
 
             # Report based on component statuses (most important)
             if unavailable_count > 0:
@@ -210,17 +331,16 @@ class HTMLParser(BaseParser):
 
         # Fallback: Check overall status banner
         # Look for: <span class="current-status-comp-status-text">Maintenance</span>
-        overall_status_span = soup.find("span", class_=re.compile(r"current-status-comp-status-text"))
+        overall_status_span = soup.find("span", class_=_RE_CURRENT_STATUS_COMP)
 
         if overall_status_span:
             text = overall_status_span.get_text(strip=True).lower()
 
-            if text in ["operational", "all systems operational", "normal"]:
+            if text in _VEEVA_BANNER_OPERATIONAL_TEXTS:
                 return StatusType.OPERATIONAL, "All systems operational"
-            elif "incident" in text or "major" in text or "outage" in text:
-                return StatusType.INCIDENT, "Service incident"
-            elif "degraded" in text or "minor" in text:
-                return StatusType.DEGRADED, "Service degraded"
+            for keyword, status, summary in _VEEVA_BANNER_KEYWORDS:
+                if keyword in text:
+                    return status, summary
             # Note: We don't trust "maintenance" banner - it's often stale or refers to scheduled events
 
         return StatusType.UNKNOWN, ""
@@ -228,9 +348,10 @@ class HTMLParser(BaseParser):
     def _extract_status_microsoft365(self, soup: BeautifulSoup) -> tuple[StatusType, str]:
         """Extract status from Microsoft 365 Admin Center service health page."""
         page_text = soup.get_text()
+        page_text_lower = page_text.lower()
 
         # Check if we're authenticated
-        if 'sign in' in page_text.lower() and 'service health' not in page_text.lower():
+        if 'sign in' in page_text_lower and 'service health' not in page_text_lower:
             return StatusType.UNKNOWN, "Authentication required"
 
         # Initialize incidents list for advisory extraction
@@ -253,9 +374,9 @@ class HTMLParser(BaseParser):
         logger.info(f"M365: Searching for advisory elements...")
 
         # Common patterns in M365 admin portal
-        advisory_elements.extend(soup.find_all('div', class_=re.compile(r'issue|incident|advisory|service-health-item', re.I)))
-        advisory_elements.extend(soup.find_all('tr', attrs={'data-automation-id': re.compile(r'issue|incident|row', re.I)}))
-        advisory_elements.extend(soup.find_all('li', class_=re.compile(r'issue|incident|advisory', re.I)))
+        advisory_elements.extend(soup.find_all('div', class_=_RE_M365_ITEM_DIV))
+        advisory_elements.extend(soup.find_all('tr', attrs={'data-automation-id': _RE_M365_ITEM_ROW}))
+        advisory_elements.extend(soup.find_all('li', class_=_RE_M365_ITEM_LI))
 
         logger.info(f"M365: Found {len(advisory_elements)} advisory elements from specific selectors")
 
@@ -293,7 +414,7 @@ class HTMLParser(BaseParser):
                 title = lines[0] if lines else elem_text[:100]
 
             # Extract ID if present (like MO123456)
-            id_match = re.search(r'\b([A-Z]{2}\d{6,})\b', elem_text)
+            id_match = _RE_M365_ADVISORY_ID.search(elem_text)
             if id_match:
                 advisory_id = id_match.group(1)
                 # Include ID in title if not already there
@@ -301,11 +422,11 @@ class HTMLParser(BaseParser):
                     title = f"{advisory_id}: {title}"
 
             # Determine type (Incident, Advisory, Service Degradation)
-            if re.search(r'\bIncident\b', elem_text):
+            if _RE_M365_INCIDENT_WORD.search(elem_text):
                 status_type = "Incident"
-            elif re.search(r'degraded|degradation', elem_text, re.I):
+            elif _RE_M365_DEGRADED_ITEM.search(elem_text):
                 status_type = "Service Degradation"
-            elif re.search(r'advisory|informational', elem_text, re.I):
+            elif _RE_M365_ADVISORY_ITEM.search(elem_text):
                 status_type = "Advisory"
 
             # Extract description (remaining text after title)
@@ -320,7 +441,7 @@ class HTMLParser(BaseParser):
                 published_at = time_elem.get('datetime')
             else:
                 # Look for date patterns in text
-                date_match = re.search(r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})', elem_text)
+                date_match = _RE_DATE.search(elem_text)
                 if date_match:
                     published_at = date_match.group(1)
 
@@ -349,18 +470,15 @@ class HTMLParser(BaseParser):
 
         # Determine overall status
         # Check for explicit service degradation status
-        if re.search(r'(service degradation|degraded)', page_text, re.I):
-            # Try to extract which service is degraded
-            lines = page_text.split('\n')
-            for i, line in enumerate(lines):
-                if re.search(r'(service degradation|degraded)', line, re.I):
-                    # Look at nearby lines for service name
-                    context = ' '.join(lines[max(0,i-2):min(len(lines),i+3)])
-                    # Common M365 services
-                    for service in ['Exchange Online', 'SharePoint', 'Teams', 'OneDrive', 'Outlook']:
-                        if service.lower() in context.lower():
-                            return StatusType.DEGRADED, f"{service}: Service degraded"
-                    return StatusType.DEGRADED, "Service degradation detected"
+        degraded_match = _RE_M365_DEGRADED.search(page_text)
+        if degraded_match:
+            # Try to extract which service is degraded from the lines
+            # around the first match
+            context = _line_context(page_text, degraded_match.start()).lower()
+            for service, service_lower in _M365_SERVICES:
+                if service_lower in context:
+                    return StatusType.DEGRADED, f"{service}: Service degraded"
+            return StatusType.DEGRADED, "Service degradation detected"
 
         # Check for major outages/incidents
         if incident_count > 0:
@@ -371,21 +489,21 @@ class HTMLParser(BaseParser):
             return StatusType.DEGRADED, f"{degraded_count} service(s) degraded"
 
         # Look for "Incident" status type (not Advisory)
-        if re.search(r'\bIncident\b', page_text):
+        if _RE_M365_INCIDENT_WORD.search(page_text):
             # Found actual incident status
             return StatusType.INCIDENT, "Active service incident"
 
         # If we see "Healthy" status for services, that's operational
         # Count healthy services vs total services mentioned
-        healthy_count = len(re.findall(r'Healthy', page_text))
+        healthy_count = page_text.count('Healthy')
 
         # If we found the service health page and see healthy services, it's operational
-        if 'service health' in page_text.lower() and healthy_count > 5:
+        if 'service health' in page_text_lower and healthy_count > 5:
             # Mention advisories if we extracted any
             if advisory_count > 0:
                 return StatusType.OPERATIONAL, f"All services healthy ({advisory_count} informational advisories)"
             # Also check for advisories mentioned in text
-            advisory_matches = re.findall(r'(\d+)\s+advisor(?:y|ies)', page_text, re.I)
+            advisory_matches = _RE_M365_ADVISORIES.findall(page_text)
             if advisory_matches:
                 total_advisories = sum(int(m) for m in advisory_matches)
                 return StatusType.OPERATIONAL, f"All services healthy ({total_advisories} informational advisories)"
@@ -1,7 +1,7 @@
 """JSON feed parser (e.g., Atlassian Statuspage API)."""
 import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from app.parsers.base import BaseParser
 from app.models import StatusType
 from app.utils.normalizer import normalize_status, normalize_component_statuses, extract_summary
@@ -13,7 +13,9 @@ logger = logging.getLogger(__name__)
 class JSONParser(BaseParser):
     """Parser for JSON status feeds (Statuspage.io format)."""
 
-    def can_parse(self, content_type: str, content: str) -> bool:
+    source_type = "json"
+
+    def can_parse(self, content_type: str, content: Union[str, bytes]) -> bool:
         """Check if content is JSON."""
         if "json" in content_type.lower():
             return True
@@ -24,7 +26,7 @@ class JSONParser(BaseParser):
         except:
             return False
 
-    async def parse(self, content: str, url: str) -> Dict[str, Any]:
+    async def parse(self, content: Union[str, bytes], url: str) -> Dict[str, Any]:
         """Parse JSON status feed."""
         try:
             data = json.loads(content)
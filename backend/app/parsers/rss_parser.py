@@ -2,8 +2,8 @@
 import feedparser
 import re
 from datetime import datetime
-from typing import Dict, Any
-from app.parsers.base import BaseParser
+from typing import Dict, Any, Union
+from app.parsers.base import BaseParser, content_head
 from app.models import StatusType
 from app.utils.normalizer import normalize_status, extract_summary
 import logging
@@ -27,16 +27,19 @@ def strip_html(text: str) -> str:
 class RSSParser(BaseParser):
     """Parser for RSS/Atom status feeds."""
 
-    def can_parse(self, content_type: str, content: str) -> bool:
+    source_type = "rss"
+
+    def can_parse(self, content_type: str, content: Union[str, bytes]) -> bool:
         """Check if content is RSS/Atom."""
         if any(x in content_type.lower() for x in ["xml", "rss", "atom"]):
             return True
         # Try to detect XML
-        if content.strip().startswith("<?xml") or "<rss" in content[:200] or "<feed" in content[:200]:
+        head = content_head(content)
+        if head.startswith("<?xml") or "<rss" in head[:200] or "<feed" in head[:200]:
             return True
         return False
 
-    async def parse(self, content: str, url: str) -> Dict[str, Any]:
+    async def parse(self, content: Union[str, bytes], url: str) -> Dict[str, Any]:
         """Parse RSS/Atom feed."""
         try:
             feed = feedparser.parse(content)
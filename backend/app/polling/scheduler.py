@@ -3,11 +3,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 import asyncio
 import logging
 
-from app.models import Site, Reading, StatusType
+from app.models import Site, Reading, StatusType, STATUS_BY_VALUE
 from app.database import engine
 from app.parsers import parser_factory
 from app.config import settings
@@ -25,6 +25,9 @@ class PollingScheduler:
         self.is_running = False
         self.next_poll_times: Dict[str, datetime] = {}
         self._lock = asyncio.Lock()
+        # Shared by every poll so scheduled, reload and manual polls together
+        # never run more than max_concurrent_scrapes fetches at once
+        self._scrape_semaphore = asyncio.BoundedSemaphore(settings.max_concurrent_scrapes)
 
     def start(self):
         """Start the scheduler."""
@@ -114,12 +117,14 @@ class PollingScheduler:
                 url = site.feed_url if site.feed_url else site.status_page
 
                 # Parse the URL
-                result = await parser_factory.parse_url(
-                    url,
-                    site.parser,
-                    use_playwright=site.use_playwright,
-                    auth_state_file=site.auth_state_file
-                )
+                async with self._scrape_semaphore:
+                    result = await parser_factory.parse_url(
+                        url,
+                        site.parser,
+                        use_playwright=site.use_playwright,
+                        auth_state_file=site.auth_state_file,
+                        ready_selector=site.ready_selector
+                    )
 
                 # Filter by configured modules if any exist
                 from app.models import SiteModule
@@ -142,17 +147,16 @@ class PollingScheduler:
 
                     if filtered_components:
                         # Re-determine status based on filtered components
-                        from app.models import StatusType
                         worst_status = StatusType.OPERATIONAL
 
                         for comp in filtered_components:
-                            comp_status_str = comp.get("status", "operational")
+                            comp_status = STATUS_BY_VALUE.get(comp.get("status", "operational"))
                             # Find worst status among filtered components
-                            if comp_status_str == "incident":
+                            if comp_status is StatusType.INCIDENT:
                                 worst_status = StatusType.INCIDENT
-                            elif comp_status_str == "degraded" and worst_status != StatusType.INCIDENT:
+                            elif comp_status is StatusType.DEGRADED and worst_status is not StatusType.INCIDENT:
                                 worst_status = StatusType.DEGRADED
-                            elif comp_status_str == "maintenance" and worst_status == StatusType.OPERATIONAL:
+                            elif comp_status is StatusType.MAINTENANCE and worst_status is StatusType.OPERATIONAL:
                                 worst_status = StatusType.MAINTENANCE
 
                         # Update result with filtered status
@@ -214,7 +218,10 @@ class PollingScheduler:
                 new_status = result["status"]
 
                 if EmailNotifier.should_notify(site, new_status, old_status):
-                    success = EmailNotifier.send_notification(
+                    # SMTP is blocking network IO; keep it off the event loop so
+                    # other polls keep running while the email goes out
+                    success = await asyncio.to_thread(
+                        EmailNotifier.send_notification,
                         site, new_status, old_status, result["summary"]
                     )
                     if success:
@@ -260,6 +267,17 @@ class PollingScheduler:
         """Get the next scheduled poll time for a site."""
         return self.next_poll_times.get(site_id)
 
+    def get_next_poll_times(self, site_ids: Optional[Iterable[str]] = None) -> Dict[str, datetime]:
+        """Snapshot next scheduled poll times, optionally limited to the given sites."""
+        if site_ids is None:
+            return dict(self.next_poll_times)
+        next_poll_times = self.next_poll_times
+        return {
+            site_id: next_poll_times[site_id]
+            for site_id in site_ids
+            if site_id in next_poll_times
+        }
+
     async def add_site_to_schedule(self, site_id: str):
         """Add a single site to the schedule."""
         with Session(engine) as session:
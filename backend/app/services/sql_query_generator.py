@@ -43,6 +43,7 @@ tables:
   - sites(id TEXT PK, display_name TEXT, status_page TEXT, feed_url TEXT, 
           poll_frequency_seconds INTEGER, parser TEXT, is_active INTEGER, 
           console_only INTEGER, use_playwright INTEGER, auth_state_file TEXT,
+          ready_selector TEXT,
           downdetector_url TEXT, latest_downdetector_screenshot TEXT,
           downdetector_screenshot_uploaded_at TEXT ISO8601,
           last_notified_at TEXT ISO8601, last_notified_status TEXT,
@@ -0,0 +1,56 @@
+"""File serving helpers."""
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Check the request's conditional headers against the file validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match uses weak comparison: W/"x" matches "x"
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+
+    return False
+
+
+def cached_file_response(
+    request: Request,
+    filepath: str,
+    cache_control: str,
+    stat_result: Optional[os.stat_result] = None,
+    default_media_type: str = "image/png",
+) -> Response:
+    """
+    Serve a file with ETag/Last-Modified validators.
+
+    Returns an empty 304 response when the client already has the current
+    version, otherwise a FileResponse with a media type guessed from the
+    filename.
+    """
+    st = stat_result or os.stat(filepath)
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    headers = {
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+    }
+
+    if _not_modified(request, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(filepath)[0] or default_media_type
+    return FileResponse(filepath, stat_result=st, media_type=media_type, headers=headers)
@@ -0,0 +1,22 @@
+"""JSON log formatting."""
+import logging
+from datetime import datetime, timezone
+
+import orjson
+
+
+class JsonFormatter(logging.Formatter):
+    """Render each log record as a single-line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return orjson.dumps(payload, default=str).decode()
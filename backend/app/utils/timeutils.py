@@ -0,0 +1,12 @@
+"""Time helpers."""
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """
+    Get the current UTC time as a naive datetime.
+
+    Stored timestamps are naive UTC, so this keeps comparisons and arithmetic
+    consistent with the database without the deprecated datetime.utcnow().
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
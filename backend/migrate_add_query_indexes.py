@@ -0,0 +1,68 @@
+"""
+Migration script to add composite (site_id, created_at) indexes.
+
+This creates:
+- ix_readings_site_created on readings(site_id, created_at)
+- ix_readings_problems on readings(site_id, created_at) for non-operational rows
+- ix_advisories_site_created on advisories(site_id, created_at)
+
+and drops ix_readings_site_id, which ix_readings_site_created makes redundant
+(site_id is its leading column).
+
+New databases get these from the models; run this once on existing databases.
+"""
+import sqlite3
+import os
+
+def migrate():
+    # Get database path
+    db_path = os.environ.get("DATABASE_URL", "sqlite:///./status_dashboard.db")
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+
+    # Check if running in Docker
+    if os.path.exists("/data/status_dashboard.db"):
+        db_path = "/data/status_dashboard.db"
+
+    print(f"Migrating database: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_readings_site_created ON readings(site_id, created_at)"
+        )
+        print("✓ Created index ix_readings_site_created")
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_readings_problems
+            ON readings(site_id, created_at)
+            WHERE status != 'OPERATIONAL'
+        """)
+        print("✓ Created index ix_readings_problems")
+
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_advisories_site_created ON advisories(site_id, created_at)"
+        )
+        print("✓ Created index ix_advisories_site_created")
+
+        cursor.execute("DROP INDEX IF EXISTS ix_readings_site_id")
+        print("✓ Dropped redundant index ix_readings_site_id")
+
+        # Refresh planner statistics so the new indexes are picked up
+        cursor.execute("ANALYZE")
+
+        conn.commit()
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
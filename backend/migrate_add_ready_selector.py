@@ -0,0 +1,53 @@
+"""
+Migration script to add the ready_selector field to sites table.
+
+ready_selector is the CSS selector a Playwright fetch waits for before
+reading the page. Run this once after updating the models to add the column.
+"""
+import sqlite3
+import os
+
+def migrate():
+    # Get database path
+    db_path = os.environ.get("DATABASE_URL", "sqlite:///./status_dashboard.db")
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+
+    # Check if running in Docker
+    if os.path.exists("/data/status_dashboard.db"):
+        db_path = "/data/status_dashboard.db"
+
+    print(f"Migrating database: {db_path}")
+
+    # Connect to database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Check if column already exists
+        cursor.execute("PRAGMA table_info(sites)")
+        columns = [column[1] for column in cursor.fetchall()]
+
+        if 'ready_selector' in columns:
+            print("✓ Column 'ready_selector' already exists")
+        else:
+            # Add the column
+            cursor.execute("""
+                ALTER TABLE sites
+                ADD COLUMN ready_selector TEXT
+            """)
+            conn.commit()
+            print("✓ Added column 'ready_selector' to sites table")
+
+        print("Migration completed successfully!")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
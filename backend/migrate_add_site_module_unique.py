@@ -0,0 +1,54 @@
+"""
+Migration script to enforce unique (site_id, module_name) on site_modules.
+
+This removes duplicate module rows (keeping the oldest) and creates the
+uq_sitemodule unique index that backs the SiteModule unique constraint.
+Run this once on existing databases.
+"""
+import sqlite3
+import os
+
+def migrate():
+    # Get database path
+    db_path = os.environ.get("DATABASE_URL", "sqlite:///./status_dashboard.db")
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+
+    # Check if running in Docker
+    if os.path.exists("/data/status_dashboard.db"):
+        db_path = "/data/status_dashboard.db"
+
+    print(f"Migrating database: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Remove duplicates so the unique index can be created
+        cursor.execute("""
+            DELETE FROM site_modules
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM site_modules GROUP BY site_id, module_name
+            )
+        """)
+        if cursor.rowcount:
+            print(f"✓ Removed {cursor.rowcount} duplicate module rows")
+
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_sitemodule ON site_modules(site_id, module_name)"
+        )
+        print("✓ Created unique index uq_sitemodule")
+
+        conn.commit()
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -3,6 +3,7 @@ import pytest
 from app.parsers.json_parser import JSONParser
 from app.parsers.rss_parser import RSSParser
 from app.parsers.html_parser import HTMLParser
+from app.parsers import ParserFactory
 from app.models import StatusType
 
 
@@ -111,6 +112,7 @@ class TestRSSParser:
         assert parser.can_parse("application/xml", "")
         assert parser.can_parse("text/html", "<?xml version")
         assert not parser.can_parse("text/html", "<html>")
+        assert parser.can_parse("text/plain", b"\n<?xml version")
 
 
 class TestHTMLParser:
@@ -152,6 +154,44 @@ class TestHTMLParser:
 
         assert result["status"] == StatusType.OPERATIONAL
 
+    @pytest.mark.asyncio
+    async def test_generic_html_headers_take_precedence(self):
+        """Test that a header status wins over an earlier status div."""
+        parser = HTMLParser()
+        content = '''
+        <html>
+          <body>
+            <div class="status-banner">Major outage last week</div>
+            <h2>All Systems Operational</h2>
+          </body>
+        </html>
+        '''
+
+        result = await parser.parse(content, "https://example.com")
+
+        assert result["status"] == StatusType.OPERATIONAL
+        assert result["summary"] == "All Systems Operational"
+
+    @pytest.mark.asyncio
+    async def test_statuscast_component_counts(self):
+        """Test StatusCast (Veeva) component status counting."""
+        parser = HTMLParser()
+        content = '''
+        <html>
+          <body>
+            <span class="status-list-component-status-text component-available">Normal</span>
+            <span class="status-list-component-status-text component-available">Normal</span>
+            <span class="status-list-component-status-text component-maintenance">Maintenance</span>
+            <span class="status-list-component-status-text component-degraded">Degraded</span>
+          </body>
+        </html>
+        '''
+
+        result = await parser.parse(content, "https://trust.example.com")
+
+        assert result["status"] == StatusType.DEGRADED
+        assert result["summary"] == "1 service(s) degraded"
+
     @pytest.mark.asyncio
     async def test_can_parse_html(self):
         """Test can_parse method."""
@@ -161,3 +201,25 @@ class TestHTMLParser:
         assert parser.can_parse("text/plain", "<!DOCTYPE html>")
         assert parser.can_parse("text/plain", "<html>")
         assert not parser.can_parse("application/json", "{}")
+        assert parser.can_parse("text/plain", b"  <!DOCTYPE html>")
+
+
+class TestParserFactory:
+    """Test automatic parser selection."""
+
+    def test_rss_served_as_html(self):
+        """Test that an RSS body wins over a text/html content type."""
+        factory = ParserFactory()
+        content = b'<?xml version="1.0"?><rss version="2.0"><channel></channel></rss>'
+
+        parser = factory._auto_select_parser("text/html; charset=utf-8", content)
+
+        assert isinstance(parser, RSSParser)
+
+    def test_html_served_as_html(self):
+        """Test that HTML served as text/html goes to the HTML parser."""
+        factory = ParserFactory()
+
+        parser = factory._auto_select_parser("text/html", b"<!DOCTYPE html><html></html>")
+
+        assert isinstance(parser, HTMLParser)